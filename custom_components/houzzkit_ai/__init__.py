@@ -17,10 +17,11 @@ from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.issue_registry import async_delete_issue
 from homeassistant.helpers.typing import ConfigType
 
-from . import dashboard, ffmpeg_proxy
+from . import alarm_clock, dashboard, ffmpeg_proxy
 from .const import CONF_BLUETOOTH_MAC_ADDRESS, CONF_NOISE_PSK, DOMAIN
 from .domain_data import DomainData
 from .entry_data import ESPHomeConfigEntry, RuntimeEntryData
+from .intent_live_context import LiveContextSnapshot
 from .manager import DEVICE_CONFLICT_ISSUE_FORMAT, ESPHomeManager, cleanup_instance
 
 from .houzzkit import mcp_transport
@@ -37,6 +38,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     await dashboard.async_setup(hass)
 
     await async_setup_https(hass)
+    await alarm_clock.async_setup(hass)
     return True
 
 
@@ -82,6 +84,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ESPHomeConfigEntry) -> b
 async def async_unload_entry(hass: HomeAssistant, entry: ESPHomeConfigEntry) -> bool:
     """Unload an esphome config entry."""
     entry_data = await cleanup_instance(entry)
+    await mcp_transport.async_remove_entry(hass, entry)
+    if not hass.config_entries.async_loaded_entries(DOMAIN):
+        # The last speaker is gone, nothing asks for the live context anymore
+        LiveContextSnapshot.async_stop_all(hass)
     return await hass.config_entries.async_unload_platforms(
         entry, entry_data.loaded_platforms
     )
@@ -0,0 +1,288 @@
+"""Alarm clocks of HOUZZkit speakers.
+
+Alarms are kept in .storage and scheduled in memory, so creating or
+removing one doesn't touch automations.yaml or reload automations.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+import logging
+from pathlib import Path
+from typing import Any, Literal
+
+import yaml
+
+from homeassistant.components.automation import DOMAIN as AUTOMATION_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_RELOAD, STATE_ON
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.event import (
+    async_track_point_in_utc_time,
+    async_track_time_change,
+)
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, ulid
+
+from .const import DOMAIN
+from .houzzkit import get_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_ALARM_CLOCK = "alarm_clock"
+STORAGE_KEY = f"{DOMAIN}.alarm_clock"
+STORAGE_VERSION = 1
+SAVE_DELAY = 1
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+ALARM_ENTITY_NAME = "Alarm"
+
+
+@dataclass(slots=True)
+class AlarmClock:
+    """An alarm clock of a speaker."""
+
+    id: str
+    alias: str
+    speak_id: str
+    kind: Literal["weekly", "countdown"]
+    # Weekly alarms ring at "at" on the given weekdays
+    at: str | None = None
+    weekdays: list[str] = field(default_factory=list)
+    # Countdown alarms ring once at "due" (UTC ISO timestamp)
+    due: str | None = None
+
+
+def find_alarm_entity_id(hass: HomeAssistant, speak_id: str) -> str | None:
+    """Return the alarm button of a speaker."""
+    entity_id = None
+    for entity in get_entities(hass, speak_id):
+        if entity.name == ALARM_ENTITY_NAME:
+            entity_id = entity.entity_id
+    return entity_id
+
+
+class AlarmClockManager:
+    """Store and schedule the alarm clocks of all speakers."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._alarms: dict[str, AlarmClock] = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+        self._migrated = False
+
+    @classmethod
+    def get(cls, hass: HomeAssistant) -> AlarmClockManager:
+        """Get the manager stored in hass.data."""
+        return hass.data[DOMAIN][DATA_ALARM_CLOCK]
+
+    async def async_load(self):
+        data = await self._store.async_load() or {}
+        self._migrated = data.get("migrated", False)
+        for raw in data.get("alarms", []):
+            alarm = AlarmClock(**raw)
+            self._alarms[alarm.id] = alarm
+            self._async_schedule(alarm)
+        if not self._migrated:
+            async_at_started(self.hass, self._async_migrate_automations)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "migrated": self._migrated,
+            "alarms": [asdict(alarm) for alarm in self._alarms.values()],
+        }
+
+    @callback
+    def _async_save(self):
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_list(self, speak_id: str | None = None) -> list[AlarmClock]:
+        return [
+            alarm
+            for alarm in self._alarms.values()
+            if speak_id is None or alarm.speak_id == speak_id
+        ]
+
+    @callback
+    def async_create(self, alarm: AlarmClock) -> AlarmClock:
+        return self.async_create_many([alarm])[0]
+
+    @callback
+    def async_create_many(self, alarms: list[AlarmClock]) -> list[AlarmClock]:
+        """Add several alarms with a single save of the store."""
+        for alarm in alarms:
+            if alarm.id in self._alarms:
+                raise ValueError(f"Duplicate alarm id {alarm.id}")
+        for alarm in alarms:
+            self._alarms[alarm.id] = alarm
+            self._async_schedule(alarm)
+        self._async_save()
+        return alarms
+
+    @callback
+    def async_delete(self, alarm_id: str) -> bool:
+        if self._alarms.pop(alarm_id, None) is None:
+            return False
+        if unsub := self._unsubs.pop(alarm_id, None):
+            unsub()
+        self._async_save()
+        return True
+
+    @callback
+    def _async_schedule(self, alarm: AlarmClock):
+        if alarm.kind == "countdown":
+            assert alarm.due is not None
+            due = dt_util.parse_datetime(alarm.due)
+            if due is None or due <= dt_util.utcnow():
+                # Expired while Home Assistant was down
+                self._alarms.pop(alarm.id, None)
+                self._async_save()
+                return
+            self._unsubs[alarm.id] = async_track_point_in_utc_time(
+                self.hass, self._async_ring_callback(alarm.id), due
+            )
+            return
+
+        assert alarm.at is not None
+        at = dt_util.parse_time(alarm.at)
+        if at is None:
+            _LOGGER.warning("Invalid alarm time %s of %s", alarm.at, alarm.alias)
+            return
+        self._unsubs[alarm.id] = async_track_time_change(
+            self.hass,
+            self._async_ring_callback(alarm.id),
+            hour=at.hour,
+            minute=at.minute,
+            second=at.second,
+        )
+
+    def _async_ring_callback(self, alarm_id: str):
+        @callback
+        def _async_ring(now: datetime):
+            if (alarm := self._alarms.get(alarm_id)) is None:
+                return
+            if alarm.kind == "countdown":
+                self._unsubs.pop(alarm_id, None)
+                self._alarms.pop(alarm_id, None)
+                self._async_save()
+            elif WEEKDAYS[dt_util.as_local(now).weekday()] not in alarm.weekdays:
+                return
+            if not (entity_id := find_alarm_entity_id(self.hass, alarm.speak_id)):
+                _LOGGER.warning("Alarm %s has no speaker to ring", alarm.alias)
+                return
+            _LOGGER.info("Alarm %s rings on %s", alarm.alias, entity_id)
+            self.hass.async_create_task(
+                self.hass.services.async_call(
+                    "button", "press", {ATTR_ENTITY_ID: entity_id}
+                )
+            )
+
+        return _async_ring
+
+    async def _async_migrate_automations(self, _hass: HomeAssistant | None = None):
+        """Move alarms created as automations into the store."""
+        path = Path(self.hass.config.path("automations.yaml"))
+        try:
+            automations = await self.hass.async_add_executor_job(_load_yaml, path)
+        except (OSError, yaml.YAMLError) as err:
+            _LOGGER.warning("Can't read automations.yaml to migrate alarms: %s", err)
+            return
+
+        kept = []
+        migrated = []
+        for automation in automations:
+            if alarm := self._alarm_from_automation(automation):
+                migrated.append(alarm)
+            else:
+                kept.append(automation)
+
+        for alarm in migrated:
+            self._alarms[alarm.id] = alarm
+            self._async_schedule(alarm)
+        self._migrated = True
+        # Save before rewriting automations.yaml so no alarm can get lost
+        await self._store.async_save(self._data_to_save())
+        if migrated:
+            await self.hass.async_add_executor_job(_dump_yaml, path, kept)
+            await self.hass.services.async_call(AUTOMATION_DOMAIN, SERVICE_RELOAD)
+            _LOGGER.info("Migrated %s alarms from automations.yaml", len(migrated))
+
+    @callback
+    def _alarm_from_automation(self, automation: Any) -> AlarmClock | None:
+        """Convert an alarm automation made by an older version.
+
+        Only repeating alarms are migrated, countdown automations disable
+        themselves after ringing and are left alone. So are alarms with
+        conditions or whose automation is turned off, the store can't keep
+        either.
+        """
+        if not isinstance(automation, dict):
+            return None
+        triggers = automation.get("triggers") or []
+        actions = automation.get("actions") or []
+        if len(triggers) != 1 or len(actions) != 1:
+            return None
+        trigger, action = triggers[0], actions[0]
+        if trigger.get("trigger") != "time" or action.get("action") != "button.press":
+            return None
+        entity_id = (action.get("target") or {}).get(ATTR_ENTITY_ID)
+        entity = er.async_get(self.hass).async_get(entity_id or "")
+        if (
+            entity is None
+            or entity.platform != DOMAIN
+            or entity.name != ALARM_ENTITY_NAME
+            or entity.config_entry_id is None
+        ):
+            return None
+        entry = self.hass.config_entries.async_get_entry(entity.config_entry_id)
+        if entry is None or not (speak_id := entry.data.get("speak_id")):
+            return None
+        alias = automation.get("alias", "")
+        if automation.get("conditions") or automation.get("condition"):
+            _LOGGER.info("Alarm automation %s has conditions, not migrated", alias)
+            return None
+        automation_entity_id = er.async_get(self.hass).async_get_entity_id(
+            AUTOMATION_DOMAIN, AUTOMATION_DOMAIN, str(automation.get("id", ""))
+        )
+        state = self.hass.states.get(automation_entity_id or "")
+        if state is None or state.state != STATE_ON:
+            _LOGGER.info("Alarm automation %s is turned off, not migrated", alias)
+            return None
+        return AlarmClock(
+            id=ulid.ulid_now(),
+            alias=alias,
+            speak_id=speak_id,
+            kind="weekly",
+            at=str(trigger.get("at")),
+            weekdays=cv.ensure_list(trigger.get("weekday") or WEEKDAYS),
+        )
+
+
+def _load_yaml(path: Path) -> list:
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8") as f:
+        return yaml.safe_load(f) or []
+
+
+def _dump_yaml(path: Path, automations: list):
+    with path.open("w", encoding="utf-8") as f:
+        yaml.dump(automations, f, default_flow_style=False, sort_keys=False)
+
+
+async def async_setup(hass: HomeAssistant):
+    manager = AlarmClockManager(hass)
+    hass.data.setdefault(DOMAIN, {})[DATA_ALARM_CLOCK] = manager
+    await manager.async_load()
+
+
+def countdown_due(hours: int, minutes: int, seconds: int) -> str:
+    """Return the due time of a countdown alarm started now."""
+    return (
+        dt_util.utcnow() + timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    ).isoformat()
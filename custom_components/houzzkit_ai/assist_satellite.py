@@ -5,12 +5,12 @@ from __future__ import annotations
 import asyncio
 from collections.abc import AsyncIterable
 from functools import partial
-import io
+import ipaddress
 from itertools import chain
 import logging
 import socket
+import time
 from typing import Any, cast
-import wave
 
 from aioesphomeapi import (
     MediaPlayerFormatPurpose,
@@ -35,11 +35,18 @@ from homeassistant.components.intent import (
     async_register_timer_handler,
 )
 from homeassistant.components.media_player import async_process_play_media_url
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
+from .audio import (
+    AudioPacer,
+    AudioRingBuffer,
+    VoiceAssistantStats,
+    WavFormatError,
+    WavStreamReader,
+)
 from .const import DOMAIN
 from .entity import EsphomeAssistEntity, convert_api_error_ha_error
 from .entry_data import ESPHomeConfigEntry
@@ -84,6 +91,12 @@ _TIMER_EVENT_TYPES: EsphomeEnumMapper[VoiceAssistantTimerEventType, TimerEventTy
 
 _ANNOUNCEMENT_TIMEOUT_SEC = 5 * 60  # 5 minutes
 _CONFIG_TIMEOUT_SEC = 5
+_TTS_LEAD_SEC = 0.3  # Audio kept queued ahead of playback on the device
+_MIC_AUDIO_MAX_CHUNKS = 256  # Microphone chunks buffered while STT catches up
+_UDP_MAX_DATAGRAM = 4096
+_UDP_BATCH_SIZE = 64  # Datagrams drained per wakeup before yielding the loop
+
+DATA_UDP_SERVER = "udp_audio_server"
 
 
 async def async_setup_entry(
@@ -118,9 +131,11 @@ class EsphomeAssistSatellite(
 
         self._is_running: bool = True
         self._pipeline_task: asyncio.Task | None = None
-        self._audio_queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self._audio_queue = AudioRingBuffer(
+            _MIC_AUDIO_MAX_CHUNKS, self._entry_data.voice_assistant_stats
+        )
         self._tts_streaming_task: asyncio.Task | None = None
-        self._udp_server: VoiceAssistantUDPServer | None = None
+        self._udp_server: VoiceAssistantUDPSession | None = None
 
         # Empty config. Updated when added to HA.
         self._satellite_config = assist_satellite.AssistSatelliteConfiguration(
@@ -440,8 +455,7 @@ class EsphomeAssistSatellite(
     ) -> int | None:
         """Handle pipeline run request."""
         # Clear audio queue
-        while not self._audio_queue.empty():
-            await self._audio_queue.get()
+        self._audio_queue.clear()
 
         if self._tts_streaming_task is not None:
             # Cancel current TTS response
@@ -460,7 +474,7 @@ class EsphomeAssistSatellite(
             feature_flags & VoiceAssistantFeature.API_AUDIO
         ):
             port = await self._start_udp_server()
-            _LOGGER.debug("Started UDP server on port %s", port)
+            _LOGGER.debug("Using UDP server on port %s", port)
 
         # Device triggered pipeline (wake word, etc.)
         if flags & VoiceAssistantCommandFlag.USE_WAKE_WORD:
@@ -585,6 +599,7 @@ class EsphomeAssistSatellite(
         sample_width: int = 2,
         sample_channels: int = 1,
         samples_per_chunk: int = 512,
+        lead: float = _TTS_LEAD_SEC,
     ) -> None:
         """Stream TTS audio chunks to device via API or UDP."""
         self.cli.send_voice_assistant_event(
@@ -601,36 +616,60 @@ class EsphomeAssistSatellite(
                 )
                 return
 
-            data = b"".join([chunk async for chunk in tts_result.async_stream_result()])
+            # Parse the header from the first chunks and forward audio as
+            # it is synthesized instead of buffering the whole response.
+            stream_start = time.monotonic()
+            wav_reader = WavStreamReader(tts_result.async_stream_result())
+            try:
+                await wav_reader.async_read_header()
+            except WavFormatError as err:
+                _LOGGER.error("Invalid WAV audio: %s", err)
+                return
 
-            with io.BytesIO(data) as wav_io, wave.open(wav_io, "rb") as wav_file:
-                if (
-                    (wav_file.getframerate() != sample_rate)
-                    or (wav_file.getsampwidth() != sample_width)
-                    or (wav_file.getnchannels() != sample_channels)
-                ):
-                    _LOGGER.error("Can only stream 16Khz 16-bit mono WAV")
-                    return
-
-                _LOGGER.debug("Streaming %s audio samples", wav_file.getnframes())
-
-                while self._is_running:
-                    chunk = wav_file.readframes(samples_per_chunk)
-                    if not chunk:
-                        break
-
-                    if self._udp_server is not None:
-                        self._udp_server.send_audio_bytes(chunk)
-                    else:
-                        self.cli.send_voice_assistant_audio(chunk)
-
-                    # Wait for 90% of the duration of the audio that was
-                    # sent for it to be played.  This will overrun the
-                    # device's buffer for very long audio, so using a media
-                    # player is preferred.
-                    samples_in_chunk = len(chunk) // (sample_width * sample_channels)
-                    seconds_in_chunk = samples_in_chunk / sample_rate
-                    await asyncio.sleep(seconds_in_chunk * 0.9)
+            if (
+                (wav_reader.sample_rate != sample_rate)
+                or (wav_reader.sample_width != sample_width)
+                or (wav_reader.channels != sample_channels)
+            ):
+                _LOGGER.error("Can only stream 16Khz 16-bit mono WAV")
+                return
+
+            # Stay lead seconds ahead of playback, measured against the
+            # monotonic clock so event loop jitter doesn't accumulate.
+            pacer = AudioPacer(
+                sample_rate,
+                sample_width * sample_channels,
+                self._entry_data.voice_assistant_stats,
+                lead=lead,
+                min_samples=samples_per_chunk,
+                max_samples=samples_per_chunk * 4,
+            )
+            samples_sent = 0
+            while self._is_running:
+                chunk = await wav_reader.async_read_chunk(pacer.next_chunk_size())
+                if not chunk:
+                    break
+
+                await pacer.async_wait()
+                if not self._is_running:
+                    break
+
+                if self._udp_server is not None:
+                    self._udp_server.send_audio_bytes(chunk)
+                else:
+                    self.cli.send_voice_assistant_audio(chunk)
+
+                if not samples_sent:
+                    first_audio = time.monotonic() - stream_start
+                    self._entry_data.voice_assistant_stats.record_tts_first_audio(
+                        first_audio
+                    )
+                    _LOGGER.debug("Time to first TTS audio: %.3fs", first_audio)
+
+                pacer.sent(len(chunk))
+                samples_sent += len(chunk) // (sample_width * sample_channels)
+
+            _LOGGER.debug("Streamed %s audio samples", samples_sent)
         except asyncio.CancelledError:
             return  # Don't trigger state change
         finally:
@@ -664,23 +703,41 @@ class EsphomeAssistSatellite(
             self._pipeline_task.cancel()
 
     async def _start_udp_server(self) -> int:
-        """Start a UDP server on a random free port."""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setblocking(False)
-        sock.bind(("", 0))  # random free port
-
-        (
-            _transport,
-            protocol,
-        ) = await asyncio.get_running_loop().create_datagram_endpoint(
-            partial(VoiceAssistantUDPServer, self._audio_queue), sock=sock
+        """Register with the shared UDP server and return its port."""
+        # A run that was not torn down would keep its session registered
+        self._stop_udp_server()
+        addresses = await self._async_get_device_addresses()
+        if not addresses:
+            _LOGGER.warning(
+                "Could not resolve the address of %s, UDP audio can't be routed",
+                self.config_entry.data.get(CONF_HOST),
+            )
+        server = VoiceAssistantUDPServer.async_get(self.hass)
+        self._udp_server = server.async_register(
+            addresses, self._audio_queue, self._entry_data.voice_assistant_stats
         )
+        return server.port
 
-        assert isinstance(protocol, VoiceAssistantUDPServer)
-        self._udp_server = protocol
+    async def _async_get_device_addresses(self) -> set[str]:
+        """Return the IPv4 addresses the device's audio can come from.
 
-        # Return port
-        return cast(int, sock.getsockname()[1])
+        The shared UDP socket is IPv4 only, so an IPv6 connection address is
+        skipped in favour of the IPv4 addresses of the configured host.
+        """
+        if (connected := self.cli.connected_address) and _is_ipv4(connected):
+            return {connected}
+        if not (host := self.config_entry.data.get(CONF_HOST)):
+            return set()
+        if _is_ipv4(host):
+            return {host}
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, None, family=socket.AF_INET, type=socket.SOCK_DGRAM
+            )
+        except OSError as err:
+            _LOGGER.debug("Failed to resolve %s: %s", host, err)
+            return set()
+        return {info[4][0] for info in infos}
 
     def _stop_udp_server(self) -> None:
         """Stop the UDP server if it's running."""
@@ -695,55 +752,163 @@ class EsphomeAssistSatellite(
         _LOGGER.debug("Stopped UDP server")
 
 
-class VoiceAssistantUDPServer(asyncio.DatagramProtocol):
-    """Receive UDP packets and forward them to the audio queue."""
+def _is_ipv4(address: str) -> bool:
+    try:
+        ipaddress.IPv4Address(address)
+    except ValueError:
+        return False
+    return True
+
+
+class VoiceAssistantUDPServer:
+    """Shared UDP endpoint for the audio of all satellites.
+
+    One socket is opened per Home Assistant instance. Each pipeline run
+    registers a session with the resolved addresses of its device, and
+    datagrams are routed to its audio queue by source address. Datagrams are drained in batches into a pre-allocated buffer
+    when the socket becomes readable.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        """Initialize server."""
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._buffer = bytearray(_UDP_MAX_DATAGRAM)
+        self._view = memoryview(self._buffer)
+        self._sessions: dict[tuple[str, int], VoiceAssistantUDPSession] = {}
+        self._pending: list[VoiceAssistantUDPSession] = []
+        self.port = cast(int, sock.getsockname()[1])
+        self.unknown_datagrams = 0
+        self._loop.add_reader(sock, self._on_readable)
+
+    @classmethod
+    @callback
+    def async_get(cls, hass: HomeAssistant) -> VoiceAssistantUDPServer:
+        """Return the shared server, opening its socket on first use."""
+        this_data = hass.data.setdefault(DOMAIN, {})
+        if (server := this_data.get(DATA_UDP_SERVER)) is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.bind(("", 0))  # random free port
+            server = this_data[DATA_UDP_SERVER] = cls(sock)
+            _LOGGER.debug("Started UDP server on port %s", server.port)
+
+            @callback
+            def _async_close(_event: Event) -> None:
+                this_data.pop(DATA_UDP_SERVER, None)
+                server.close()
+
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close)
+        return server
 
-    transport: asyncio.DatagramTransport | None = None
-    remote_addr: tuple[str, int] | None = None
+    @callback
+    def async_register(
+        self,
+        addresses: set[str],
+        audio_queue: AudioRingBuffer,
+        stats: VoiceAssistantStats,
+    ) -> VoiceAssistantUDPSession:
+        """Register a pipeline run expecting audio from one of addresses."""
+        session = VoiceAssistantUDPSession(self, addresses, audio_queue, stats)
+        self._pending.append(session)
+        return session
+
+    def unregister(self, session: VoiceAssistantUDPSession) -> None:
+        """Stop routing audio to a session."""
+        if session in self._pending:
+            self._pending.remove(session)
+        if (
+            session.remote_addr is not None
+            and self._sessions.get(session.remote_addr) is session
+        ):
+            del self._sessions[session.remote_addr]
 
-    def __init__(
-        self, audio_queue: asyncio.Queue[bytes | None], *args: Any, **kwargs: Any
-    ) -> None:
-        """Initialize protocol."""
-        super().__init__(*args, **kwargs)
-        self._audio_queue = audio_queue
+    def _bind(self, addr: tuple[str, int]) -> VoiceAssistantUDPSession | None:
+        """Bind the first datagram from addr to a waiting session."""
+        session = next(
+            (pending for pending in self._pending if addr[0] in pending.addresses),
+            None,
+        )
+        if session is None:
+            return None
+        self._pending.remove(session)
+        session.remote_addr = addr
+        self._sessions[addr] = session
+        return session
+
+    def _on_readable(self) -> None:
+        """Drain a batch of datagrams from the socket."""
+        for _ in range(_UDP_BATCH_SIZE):
+            try:
+                size, addr = self._sock.recvfrom_into(self._buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as err:
+                _LOGGER.error(
+                    "ESPHome Voice Assistant UDP server error received: %s", err
+                )
+                # Like a socket of their own would, end the runs the
+                # error may be about instead of leaving them waiting
+                for session in self._sessions.values():
+                    session.audio_queue.put_nowait(None)
+                return
 
-    def connection_made(self, transport: asyncio.BaseTransport) -> None:
-        """Store transport for later use."""
-        self.transport = cast(asyncio.DatagramTransport, transport)
+            if (session := self._sessions.get(addr)) is None and (
+                session := self._bind(addr)
+            ) is None:
+                self.unknown_datagrams += 1
+                continue
 
-    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
-        """Handle incoming UDP packet."""
-        if self.remote_addr is None:
-            self.remote_addr = addr
+            session.audio_queue.put_nowait(bytes(self._view[:size]))
 
-        self._audio_queue.put_nowait(data)
+    def sendto(self, data: bytes, addr: tuple[str, int]) -> bool:
+        """Send bytes to a device, False if they were dropped."""
+        try:
+            self._sock.sendto(data, addr)
+        except (BlockingIOError, InterruptedError):
+            _LOGGER.debug("UDP send buffer full, dropped audio to %s", addr)
+            return False
+        except OSError as err:
+            _LOGGER.error("ESPHome Voice Assistant UDP send failed: %s", err)
+            return False
+        return True
 
-    def error_received(self, exc: Exception) -> None:
-        """Handle when a send or receive operation raises an OSError.
+    def close(self) -> None:
+        """Close the socket."""
+        self._loop.remove_reader(self._sock)
+        self._sock.close()
+        self._sessions.clear()
+        self._pending.clear()
 
-        (Other than BlockingIOError or InterruptedError.)
-        """
-        _LOGGER.error("ESPHome Voice Assistant UDP server error received: %s", exc)
 
-        # Stop pipeline
-        self._audio_queue.put_nowait(None)
+class VoiceAssistantUDPSession:
+    """Audio exchanged with one satellite through the shared UDP server."""
 
-    def close(self) -> None:
-        """Close the receiver."""
-        if self.transport is not None:
-            self.transport.close()
+    remote_addr: tuple[str, int] | None = None
+
+    def __init__(
+        self,
+        server: VoiceAssistantUDPServer,
+        addresses: set[str],
+        audio_queue: AudioRingBuffer,
+        stats: VoiceAssistantStats,
+    ) -> None:
+        """Initialize session."""
+        self._server = server
+        self.addresses = addresses
+        self.audio_queue = audio_queue
+        self._stats = stats
 
+    def close(self) -> None:
+        """Close the session."""
+        self._server.unregister(self)
         self.remote_addr = None
 
     def send_audio_bytes(self, data: bytes) -> None:
         """Send bytes to the device via UDP."""
-        if self.transport is None:
-            _LOGGER.error("No transport to send audio to")
-            return
-
         if self.remote_addr is None:
             _LOGGER.error("No address to send audio to")
             return
 
-        self.transport.sendto(data, self.remote_addr)
+        if not self._server.sendto(data, self.remote_addr):
+            self._stats.tts_chunks_dropped += 1
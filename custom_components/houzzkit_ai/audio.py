@@ -0,0 +1,258 @@
+"""Audio helpers for ESPHome voice assistants."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import dataclass
+import struct
+import time
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+_CHUNK_HEADER = struct.Struct("<4sI")
+_FMT = struct.Struct("<HHIIHH")
+
+
+class WavFormatError(Exception):
+    """Raised when a WAV stream can't be parsed."""
+
+
+@dataclass(slots=True)
+class VoiceAssistantStats:
+    """Counters of the audio streamed to and from a voice assistant."""
+
+    tts_streams: int = 0
+    tts_first_audio_last: float | None = None
+    tts_first_audio_max: float | None = None
+    tts_underruns: int = 0
+    tts_underrun_seconds: float = 0.0
+    # Datagrams of TTS and announcement audio the socket had no room for
+    tts_chunks_dropped: int = 0
+    mic_chunks_dropped: int = 0
+    mic_chunks_late: int = 0
+
+    def record_tts_first_audio(self, seconds: float) -> None:
+        """Record the time from TTS stream start to the first audio sent."""
+        self.tts_streams += 1
+        self.tts_first_audio_last = seconds
+        if self.tts_first_audio_max is None or seconds > self.tts_first_audio_max:
+            self.tts_first_audio_max = seconds
+
+
+class AudioRingBuffer:
+    """Bounded buffer of microphone audio which drops the oldest chunks.
+
+    Putting None ends the stream: get() returns None once the buffered audio
+    has been read, and audio arriving after the end is dropped as late until
+    the buffer is cleared for the next pipeline run.
+    """
+
+    def __init__(self, maxlen: int, stats: VoiceAssistantStats) -> None:
+        """Initialize the buffer."""
+        self._maxlen = maxlen
+        self._stats = stats
+        self._chunks: deque[bytes] = deque(maxlen=maxlen)
+        self._ended = False
+        self._waiter: asyncio.Future[None] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of buffered chunks."""
+        return len(self._chunks)
+
+    def put_nowait(self, chunk: bytes | None) -> None:
+        """Add a chunk of audio, or None to end the stream."""
+        if chunk is None:
+            self._ended = True
+        elif self._ended:
+            self._stats.mic_chunks_late += 1
+            return
+        else:
+            if len(self._chunks) == self._maxlen:
+                self._stats.mic_chunks_dropped += 1
+            self._chunks.append(chunk)
+
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self) -> bytes | None:
+        """Return the oldest chunk, or None when the stream has ended."""
+        while not self._chunks:
+            if self._ended:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._chunks.popleft()
+
+    def clear(self) -> None:
+        """Drop all buffered audio and reopen the stream."""
+        self._chunks = deque(maxlen=self._maxlen)
+        self._ended = False
+
+
+class WavStreamReader:
+    """Read PCM frames from a WAV byte stream as the bytes arrive.
+
+    The header is parsed from the first chunks of the stream, so audio can be
+    forwarded before the whole file has been synthesized. The data size in the
+    header is ignored since streaming TTS engines don't know it up front.
+    """
+
+    def __init__(self, stream: AsyncIterable[bytes]) -> None:
+        """Initialize the reader."""
+        self._stream = aiter(stream)
+        self._buffer = bytearray()
+        self._eof = False
+        self.sample_rate = 0
+        self.sample_width = 0
+        self.channels = 0
+
+    @property
+    def frame_size(self) -> int:
+        """Return the number of bytes in one frame (all channels)."""
+        return self.sample_width * self.channels
+
+    async def _async_fill(self, size: int) -> bool:
+        """Read from the stream until the buffer holds size bytes."""
+        while len(self._buffer) < size and not self._eof:
+            try:
+                self._buffer += await anext(self._stream)
+            except StopAsyncIteration:
+                self._eof = True
+        return len(self._buffer) >= size
+
+    async def _async_read_exactly(self, size: int) -> bytes:
+        """Read size bytes or raise if the stream ends first."""
+        if not await self._async_fill(size):
+            raise WavFormatError("Unexpected end of WAV header")
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def async_read_header(self) -> None:
+        """Parse the WAV header up to the start of the data chunk."""
+        riff = await self._async_read_exactly(12)
+        if riff[:4] != b"RIFF" or riff[8:] != b"WAVE":
+            raise WavFormatError("Not a RIFF/WAVE stream")
+
+        has_format = False
+        while True:
+            chunk_id, chunk_size = _CHUNK_HEADER.unpack(
+                await self._async_read_exactly(_CHUNK_HEADER.size)
+            )
+            if chunk_id == b"data":
+                break
+            # Chunks are word aligned
+            body = await self._async_read_exactly(chunk_size + (chunk_size & 1))
+            if chunk_id != b"fmt ":
+                continue
+            if chunk_size < _FMT.size:
+                raise WavFormatError("Truncated fmt chunk")
+            (
+                audio_format,
+                self.channels,
+                self.sample_rate,
+                _byte_rate,
+                _block_align,
+                bits_per_sample,
+            ) = _FMT.unpack_from(body)
+            if audio_format not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_EXTENSIBLE):
+                raise WavFormatError(f"Unsupported WAV format {audio_format:#x}")
+            self.sample_width = (bits_per_sample + 7) // 8
+            has_format = True
+
+        if not has_format or not self.frame_size:
+            raise WavFormatError("Missing fmt chunk")
+
+    async def async_read_chunk(self, chunk_size: int) -> bytes:
+        """Read the next chunk_size bytes of PCM data.
+
+        The chunk is shorter at the end of the stream, but always holds whole
+        frames. An empty chunk means the stream has ended.
+        """
+        chunk_size = max(chunk_size - chunk_size % self.frame_size, self.frame_size)
+        if not await self._async_fill(chunk_size):
+            chunk_size = len(self._buffer) - len(self._buffer) % self.frame_size
+        chunk = bytes(self._buffer[:chunk_size])
+        del self._buffer[:chunk_size]
+        if self._eof and len(self._buffer) < self.frame_size:
+            self._buffer.clear()
+        return chunk
+
+    async def async_iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Yield PCM data in chunks of chunk_size bytes as it arrives."""
+        while chunk := await self.async_read_chunk(chunk_size):
+            yield chunk
+
+
+class AudioPacer:
+    """Pace audio sent to a device against a monotonic playback clock.
+
+    Playback is assumed to start with the first chunk, and each following
+    chunk is held back until the device has less than lead seconds of audio
+    left to play. Deadlines are computed from the total audio sent, so sleep
+    overshoot and event loop jitter don't accumulate. When a chunk is sent
+    after the device ran dry, an underrun and the length of the gap are
+    counted and the clock is re-anchored.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_size: int,
+        stats: VoiceAssistantStats,
+        lead: float = 0.3,
+        min_samples: int = 512,
+        max_samples: int = 2048,
+    ) -> None:
+        """Initialize the pacer."""
+        self._sample_rate = sample_rate
+        self._frame_size = frame_size
+        self._stats = stats
+        self._lead = lead
+        self._min_samples = min_samples
+        self._max_samples = max_samples
+        self._start: float | None = None
+        self._seconds_sent = 0.0
+
+    def _ahead(self, now: float) -> float:
+        """Return the seconds of audio sent but not played yet."""
+        if self._start is None:
+            return 0.0
+        return self._seconds_sent - (now - self._start)
+
+    def next_chunk_size(self) -> int:
+        """Return the bytes to send next.
+
+        Chunks grow up to max_samples while the device is short of the lead,
+        so it catches up in fewer sends.
+        """
+        missing = self._lead - max(self._ahead(time.monotonic()), 0.0)
+        samples = min(
+            max(int(missing * self._sample_rate), self._min_samples), self._max_samples
+        )
+        return samples * self._frame_size
+
+    async def async_wait(self) -> None:
+        """Wait until the next chunk is due."""
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+            return
+
+        ahead = self._ahead(now)
+        if ahead < 0:
+            # The device ran out of audio, playback restarts from now.
+            self._stats.tts_underruns += 1
+            self._stats.tts_underrun_seconds += -ahead
+            self._start = now - self._seconds_sent
+        elif ahead > self._lead:
+            await asyncio.sleep(ahead - self._lead)
+
+    def sent(self, chunk_size: int) -> None:
+        """Account for a chunk of chunk_size bytes sent to the device."""
+        self._seconds_sent += chunk_size / self._frame_size / self._sample_rate
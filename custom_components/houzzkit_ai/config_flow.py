@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections import OrderedDict
 from collections.abc import Mapping
 import json
@@ -41,17 +42,18 @@ from homeassistant.helpers.service_info.hassio import HassioServiceInfo
 from homeassistant.helpers.service_info.mqtt import MqttServiceInfo
 from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 from homeassistant.util.json import json_loads_object
-from homeassistant.util import ulid
 
 from .const import (
     CONF_ALLOW_SERVICE_CALLS,
     CONF_DEVICE_NAME,
+    CONF_MAX_TOOL_RESULT_SIZE,
     CONF_NOISE_PSK,
     CONF_SUBSCRIBE_LOGS,
     DEFAULT_ALLOW_SERVICE_CALLS,
     DEFAULT_NEW_CONFIG_ALLOW_ALLOW_SERVICE_CALLS,
     DEFAULT_PORT,
     DOMAIN,
+    SOURCE_BULK,
 )
 from .dashboard import async_get_or_create_dashboard_manager, async_set_dashboard_info
 from .encryption_key_storage import async_get_encryption_key_storage
@@ -59,6 +61,8 @@ from .entry_data import ESPHomeConfigEntry
 from .manager import async_replace_device
 from .houzzkit import Dict
 from .houzzkit.http import async_setup_https
+from .houzzkit.mcp_limits import DEFAULT_MAX_TOOL_RESULT_SIZE
+from .houzzkit.pending import PendingSetupStore
 
 ERROR_REQUIRES_ENCRYPTION_KEY = "requires_encryption_key"
 ERROR_INVALID_ENCRYPTION_KEY = "invalid_psk"
@@ -67,6 +71,8 @@ _LOGGER = logging.getLogger(__name__)
 
 ZERO_NOISE_PSK = "MDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDA="
 DEFAULT_NAME = "Houzzkit"
+# Seconds the flow waits for the speaker's setup data after the QR code is scanned
+SETUP_DATA_TIMEOUT = 300
 
 
 class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
@@ -92,6 +98,7 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
         self._device_name: str | None = None
         self._device_mac: str | None = None
         self._entry_with_name_conflict: ConfigEntry | None = None
+        self._setup_task: asyncio.Task[str | None] | None = None
 
     async def _async_step_user_base(
         self, user_input: dict[str, Any] | None = None, error: str | None = None
@@ -125,52 +132,17 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
     async def async_step_qrcode(self, user_input=None):
         await async_setup_https(self.hass)
         errors = {}
-        schema = {}
-        this_data = self.hass.data.setdefault(DOMAIN, {})
+        pending = PendingSetupStore.get(self.hass)
         uuid = self._extra.setup_uuid
-        if not uuid:
-            self._extra.setup_uuid = uuid = ulid.ulid_hex()
-            this_data[uuid] = None
+        if not uuid or uuid not in pending:
+            # New flow, or its slot expired and the QR code needs a new uuid
+            self._extra.setup_uuid = uuid = pending.async_create()
             _LOGGER.info("Waiting for setup data: %s", uuid)
-        else:
-            if user_input is None:
-                user_input = {}
-            setup_data = this_data.setdefault(uuid, None)
-            if setup_data:
-                self._host = setup_data[CONF_HOST]
-                port = setup_data.get(CONF_PORT, 6053)
-                #把port 转成int类型
-                try:
-                    self._port = int(port)  # 尝试转换为整数
-                except (TypeError, ValueError):
-                    # 转换失败时使用默认值 6053
-                    self._port = 6053
-                    _LOGGER.exception(f"Invalid port value '{port}', using default 6053")
-                self._noise_psk = setup_data.get(CONF_NOISE_PSK)
-                error = await self.fetch_device_info()
-                self._name = setup_data.get("speak_name") or self._name
-                if error:
-                    errors["base"] = error
-                elif not user_input.get("submit_confirm"):
-                    self._extra.tip = "\n".join([
-                        "设备信息如下:",
-                        f"**名称**: {self._name}",
-                        f"**IP**: {self._host}",
-                        f"**MAC**: {self._device_mac}",
-                    ])
-                    schema = {
-                        vol.Required("submit_confirm", default=True): selector.BooleanSelector(),
-                    }
-                else:
-                    this_data.pop(uuid, None)
-                    self._extra.pop("setup_uuid", None)
-                    self._extra.config_data = {
-                        "uuid": uuid,
-                        "mac": self._device_mac,
-                        "speak_id": setup_data.get("speak_id"),
-                        "mcp_endpoint": setup_data.get("mcp_endpoint"),
-                    }
-                    return await self._async_authenticate_or_add()
+        elif user_input is not None:
+            # Scanned, the flow goes on by itself once the speaker posts its data
+            return await self.async_step_qrcode_wait()
+        if error := self._extra.pop("error", None):
+            errors["base"] = error
         haid = self.hass.data["core.uuid"]
         internal = get_url(self.hass, prefer_external=False)
         if not self._extra.tip:
@@ -182,7 +154,7 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
             step_id="qrcode",
             errors=errors,
             data_schema=vol.Schema(
-                schema or {
+                {
                     vol.Optional("qrcode"): selector.QrCodeSelector(
                         config=selector.QrCodeSelectorConfig(
                             data=f"{internal}/api/houzzkit-ai/setup/qrcode?haid={haid}&uuid={uuid}",
@@ -197,6 +169,97 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
             },
         )
 
+    async def async_step_qrcode_wait(self, user_input=None):
+        """Wait for the setup data of the scanned QR code and probe the speaker."""
+        if self._setup_task is None:
+            self._setup_task = self.hass.async_create_task(
+                self._async_fetch_setup_data(self._extra.setup_uuid)
+            )
+        if not self._setup_task.done():
+            return self.async_show_progress(
+                step_id="qrcode_wait",
+                progress_action="wait_setup_data",
+                progress_task=self._setup_task,
+            )
+        task, self._setup_task = self._setup_task, None
+        # Raises AbortFlow if the speaker is already configured
+        if error := task.result():
+            self._extra.error = error
+            return self.async_show_progress_done(next_step_id="qrcode")
+        return self.async_show_progress_done(next_step_id="qrcode_confirm")
+
+    async def _async_fetch_setup_data(self, uuid: str) -> str | None:
+        """Wait for the speaker's setup data, then fetch its device info."""
+        setup_data = await PendingSetupStore.get(self.hass).async_wait(uuid, SETUP_DATA_TIMEOUT)
+        if not setup_data:
+            return "setup_timeout"
+        self._extra.setup_data = setup_data
+        self._host = setup_data[CONF_HOST]
+        port = setup_data.get(CONF_PORT, 6053)
+        #把port 转成int类型
+        try:
+            self._port = int(port)  # 尝试转换为整数
+        except (TypeError, ValueError):
+            # 转换失败时使用默认值 6053
+            self._port = 6053
+            _LOGGER.exception(f"Invalid port value '{port}', using default 6053")
+        self._noise_psk = setup_data.get(CONF_NOISE_PSK)
+        error = await self.fetch_device_info()
+        self._name = setup_data.get("speak_name") or self._name
+        return error
+
+    async def async_step_qrcode_confirm(self, user_input=None):
+        if user_input and user_input.get("submit_confirm"):
+            uuid = self._extra.pop("setup_uuid", None)
+            PendingSetupStore.get(self.hass).async_pop(uuid)
+            setup_data = self._extra.setup_data or {}
+            self._extra.config_data = {
+                "uuid": uuid,
+                "mac": self._device_mac,
+                "speak_id": setup_data.get("speak_id"),
+                "mcp_endpoint": setup_data.get("mcp_endpoint"),
+            }
+            return await self._async_authenticate_or_add()
+        return self.async_show_form(
+            step_id="qrcode_confirm",
+            data_schema=vol.Schema({
+                vol.Required("submit_confirm", default=True): selector.BooleanSelector(),
+            }),
+            description_placeholders={
+                "tip": "\n".join([
+                    "设备信息如下:",
+                    f"**名称**: {self._name}",
+                    f"**IP**: {self._host}",
+                    f"**MAC**: {self._device_mac}",
+                ]),
+            },
+        )
+
+    @callback
+    def async_remove(self) -> None:
+        """Drop the pending setup slot of an abandoned flow."""
+        if self._setup_task is not None:
+            self._setup_task.cancel()
+        if uuid := self._extra.setup_uuid:
+            PendingSetupStore.get(self.hass).async_pop(uuid)
+
+    async def async_step_bulk(self, discovery_info: dict[str, Any]) -> ConfigFlowResult:
+        """Handle a speaker of a bulk provisioning request, without any form."""
+        self._host = discovery_info[CONF_HOST]
+        self._port = discovery_info.get(CONF_PORT) or DEFAULT_PORT
+        self._noise_psk = discovery_info.get(CONF_NOISE_PSK) or None
+        if error := await self.fetch_device_info():
+            return self.async_abort(reason=error)
+        # The same speaker listed twice under different hosts is probed twice
+        await self.async_set_unique_id(self._device_mac)
+        self._name = discovery_info.get("speak_name") or self._name
+        self._extra.config_data = {
+            "mac": self._device_mac,
+            "speak_id": discovery_info.get("speak_id"),
+            "mcp_endpoint": discovery_info.get("mcp_endpoint"),
+        }
+        return await self._async_authenticate_or_add()
+
     async def async_step_reauth(
         self, entry_data: Mapping[str, Any]
     ) -> ConfigFlowResult:
@@ -797,7 +860,10 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
         assert self._device_info is not None
         mac_address = format_mac(self._device_info.mac_address)
         await self.async_set_unique_id(mac_address, raise_on_progress=False)
-        if self.source not in (SOURCE_REAUTH, SOURCE_RECONFIGURE):
+        if self.source == SOURCE_BULK:
+            # Bulk setup only adds speakers, it never rewrites existing entries
+            self._abort_unique_id_configured_with_details(updates={})
+        elif self.source not in (SOURCE_REAUTH, SOURCE_RECONFIGURE):
             self._abort_unique_id_configured_with_details(
                 updates={
                     CONF_HOST: self._host,
@@ -917,6 +983,12 @@ class OptionsFlowHandler(OptionsFlow):
                     CONF_SUBSCRIBE_LOGS,
                     default=self.config_entry.options.get(CONF_SUBSCRIBE_LOGS, False),
                 ): bool,
+                vol.Required(
+                    CONF_MAX_TOOL_RESULT_SIZE,
+                    default=self.config_entry.options.get(
+                        CONF_MAX_TOOL_RESULT_SIZE, DEFAULT_MAX_TOOL_RESULT_SIZE
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=4096)),
             }
         )
         return self.async_show_form(step_id="init", data_schema=data_schema)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from dataclasses import asdict
 from typing import Any
 
 from homeassistant.components.bluetooth import async_scanner_by_source
@@ -13,8 +14,15 @@ from . import CONF_NOISE_PSK
 from .const import CONF_DEVICE_NAME
 from .dashboard import async_get_dashboard
 from .entry_data import ESPHomeConfigEntry
+from .houzzkit.mcp_transport import get_transport
 
-REDACT_KEYS = {CONF_NOISE_PSK, CONF_PASSWORD, "mac_address", "bluetooth_mac_address"}
+REDACT_KEYS = {
+    CONF_NOISE_PSK,
+    CONF_PASSWORD,
+    "mac_address",
+    "bluetooth_mac_address",
+    "mcp_endpoint",
+}
 CONFIGURED_DEVICE_KEYS = (
     "configuration",
     "current_version",
@@ -56,6 +64,11 @@ async def async_get_config_entry_diagnostics(
             "scanner": await scanner.async_diagnostics(),
         }
 
+    diag["voice_assistant"] = asdict(entry_data.voice_assistant_stats)
+
+    if transport := get_transport(hass, config_entry.entry_id):
+        diag["mcp"] = transport.diagnostics()
+
     diag_dashboard: dict[str, Any] = {"configured": False}
     diag["dashboard"] = diag_dashboard
     if dashboard := async_get_dashboard(hass):
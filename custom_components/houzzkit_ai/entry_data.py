@@ -56,6 +56,7 @@ from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.storage import Store
 
+from .audio import VoiceAssistantStats
 from .const import DOMAIN
 from .dashboard import async_get_dashboard
 
@@ -184,6 +185,9 @@ class RuntimeEntryData:
     entity_removal_callbacks: dict[EntityInfoKey, list[CALLBACK_TYPE]] = field(
         default_factory=dict
     )
+    voice_assistant_stats: VoiceAssistantStats = field(
+        default_factory=VoiceAssistantStats
+    )
 
     @property
     def name(self) -> str:
@@ -296,6 +300,9 @@ class RuntimeEntryData:
                 needed_platforms.add(Platform.SELECT)
 
         needed_platforms.update(INFO_TYPE_TO_PLATFORM[type(info)] for info in infos)
+        if entry.data.get("mcp_endpoint"):
+            # Diagnostic sensors of the MCP transport
+            needed_platforms.add(Platform.SENSOR)
         await self._ensure_platforms_loaded(hass, entry, needed_platforms)
 
         # Make a dict of the EntityInfo by type and send
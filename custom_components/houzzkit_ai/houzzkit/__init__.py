@@ -1,5 +1,15 @@
 from ..const import DOMAIN
+from homeassistant.config_entries import (
+    SIGNAL_CONFIG_ENTRY_CHANGED,
+    ConfigEntry,
+    ConfigEntryChange,
+)
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+DATA_SPEAKER_INDEX = "speaker_index"
+
 
 class Dict(dict):
     def __getattr__(self, item):
@@ -10,20 +20,124 @@ class Dict(dict):
         self[key] = Dict(value) if isinstance(value, dict) else value
 
 
-def get_config_entry(hass, speak_id=None, mac=None):
-    for entry in hass.config_entries.async_entries(DOMAIN):
-        data = Dict(entry.data)
-        if speak_id and speak_id == data.speak_id:
+class SpeakerIndex:
+    """Config entries indexed by speak_id and MAC, with cached entity lists
+    and request signing keys.
+
+    The index follows config entry add/update/remove, the entity lists are
+    dropped when the entity registry changes one of their entities.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._by_speak_id: dict[str, ConfigEntry] = {}
+        self._by_mac: dict[str, ConfigEntry] = {}
+        self._keys: dict[str, tuple[str | None, str | None]] = {}
+        self._sign_keys: dict[str, str] = {}
+        self._entities: dict[str, list[er.RegistryEntry]] = {}
+        self._entity_entries: dict[str, str] = {}
+
+    @classmethod
+    @callback
+    def get(cls, hass: HomeAssistant) -> "SpeakerIndex":
+        """Get the index stored in hass.data, creating it on first use."""
+        this_data = hass.data.setdefault(DOMAIN, {})
+        if (index := this_data.get(DATA_SPEAKER_INDEX)) is None:
+            index = this_data[DATA_SPEAKER_INDEX] = cls(hass)
+            index.async_start()
+        return index
+
+    @callback
+    def async_start(self):
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            self._async_add_entry(entry)
+        async_dispatcher_connect(
+            self.hass, SIGNAL_CONFIG_ENTRY_CHANGED, self._async_entry_changed
+        )
+        self.hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_registry_updated
+        )
+
+    @callback
+    def _async_entry_changed(self, change: ConfigEntryChange, entry: ConfigEntry):
+        if entry.domain != DOMAIN:
+            return
+        self._async_remove_entry(entry.entry_id)
+        if change != ConfigEntryChange.REMOVED:
+            self._async_add_entry(entry)
+
+    @callback
+    def _async_add_entry(self, entry: ConfigEntry):
+        speak_id = entry.data.get("speak_id")
+        mac = entry.data.get("mac")
+        if speak_id:
+            self._by_speak_id[speak_id] = entry
+        if mac:
+            self._by_mac[mac] = entry
+        self._keys[entry.entry_id] = (speak_id, mac)
+        self._sign_keys[entry.entry_id] = (mac or "").lower()
+
+    @callback
+    def _async_remove_entry(self, entry_id: str):
+        speak_id, mac = self._keys.pop(entry_id, (None, None))
+        self._sign_keys.pop(entry_id, None)
+        for index, key in ((self._by_speak_id, speak_id), (self._by_mac, mac)):
+            if key and (entry := index.get(key)) and entry.entry_id == entry_id:
+                del index[key]
+        self._async_drop_entities(entry_id)
+
+    @callback
+    def _async_drop_entities(self, entry_id: str | None):
+        for entity in self._entities.pop(entry_id, ()):
+            self._entity_entries.pop(entity.entity_id, None)
+
+    @callback
+    def _async_entity_registry_updated(self, event: Event):
+        entity_id = event.data["entity_id"]
+        self._async_drop_entities(self._entity_entries.get(entity_id))
+        if old_entity_id := event.data.get("old_entity_id"):
+            self._async_drop_entities(self._entity_entries.get(old_entity_id))
+        if event.data["action"] != "remove" and (
+            entity := er.async_get(self.hass).async_get(entity_id)
+        ):
+            # New or moved entities belong to a list which doesn't know them yet.
+            self._async_drop_entities(entity.config_entry_id)
+
+    @callback
+    def async_get_entry(self, speak_id=None, mac=None) -> ConfigEntry | None:
+        if speak_id and (entry := self._by_speak_id.get(speak_id)):
             return entry
-        if mac and mac == data.mac:
+        if mac and (entry := self._by_mac.get(mac)):
             return entry
-    return None
+        return None
+
+    @callback
+    def async_get_sign_key(self, entry: ConfigEntry) -> str:
+        """Return the key of the request signatures of an entry."""
+        if (key := self._sign_keys.get(entry.entry_id)) is None:
+            key = (entry.data.get("mac") or "").lower()
+        return key
+
+    @callback
+    def async_get_entities(self, entry_id: str) -> list[er.RegistryEntry]:
+        if (entities := self._entities.get(entry_id)) is None:
+            entities = self._entities[entry_id] = er.async_entries_for_config_entry(
+                er.async_get(self.hass), entry_id
+            )
+            for entity in entities:
+                self._entity_entries[entity.entity_id] = entry_id
+        return entities
+
+
+def get_config_entry(hass, speak_id=None, mac=None):
+    return SpeakerIndex.get(hass).async_get_entry(speak_id, mac)
 
 def get_entities(hass, speak_id=None, mac=None):
-    entry = get_config_entry(hass, speak_id, mac)
+    index = SpeakerIndex.get(hass)
+    entry = index.async_get_entry(speak_id, mac)
     if not entry:
         return []
-    return er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+    return index.async_get_entities(entry.entry_id)
 
 def get_entities_ids(hass, speak_id=None, mac=None):
     return [
@@ -1,46 +1,115 @@
-import hashlib
+import asyncio
+import logging
+
 from aiohttp import web
-from homeassistant.core import HomeAssistant
-from homeassistant.const import CONF_HOST
-from homeassistant.helpers import device_registry as dr
-from homeassistant.components.http import HomeAssistantView, KEY_HASS
-from ..const import DOMAIN
+import voluptuous as vol
+from yarl import URL
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import (
+    area_registry as ar,
+    config_validation as cv,
+    device_registry as dr,
+)
+from homeassistant.components.http import HomeAssistantView, KEY_HASS, require_admin
+from ..const import CONF_NOISE_PSK, DEFAULT_PORT, DOMAIN, SOURCE_BULK
+from . import SpeakerIndex
+from .pending import PendingSetupStore
+from .sign import NonceCache, verify_sign
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def valid_mcp_endpoint(value) -> str:
+    """Validate a ws or wss URL with a host."""
+    endpoint = cv.string(value)
+    try:
+        url = URL(endpoint)
+    except (TypeError, ValueError) as err:
+        raise vol.Invalid("invalid mcp_endpoint") from err
+    if url.scheme not in ("ws", "wss") or not url.host:
+        raise vol.Invalid("mcp_endpoint must be a ws or wss URL")
+    return endpoint
+
+
+# Request key of the JSON body parsed by the view
+KEY_BODY = "houzzkit_body"
+# Speakers of one bulk request, and how many are probed at once
+BULK_MAX_DEVICES = 100
+BULK_MAX_PARALLEL = 8
+BULK_DEVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_HOST): cv.string,
+        vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Optional(CONF_NOISE_PSK): cv.string,
+        vol.Optional("speak_id"): cv.string,
+        vol.Optional("speak_name"): cv.string,
+        vol.Optional("mcp_endpoint"): valid_mcp_endpoint,
+    }
+)
+# Speakers of one batch rename request
+BATCH_MAX_UPDATES = 200
+BATCH_UPDATES_SCHEMA = vol.All(
+    [
+        vol.Schema(
+            {
+                vol.Required("speak_id"): cv.string,
+                vol.Optional("speak_name"): vol.All(cv.string, vol.Length(min=1)),
+                vol.Optional("area"): vol.All(cv.string, vol.Length(min=1)),
+            }
+        )
+    ],
+    vol.Length(min=1, max=BATCH_MAX_UPDATES),
+)
 
 async def async_setup_https(hass: HomeAssistant):
     this_data = hass.data.setdefault(DOMAIN, {})
     if this_data.get("https_setup"):
         return
     this_data["https_setup"] = True
+    this_data["sign_nonces"] = NonceCache()
     hass.http.register_view(HouzzkitSetupView)
     hass.http.register_view(HouzzkitRemoveView)
     hass.http.register_view(HouzzkitSetNameView)
+    hass.http.register_view(HouzzkitBulkSetupView)
+    hass.http.register_view(HouzzkitBatchUpdateView)
 
 
 class HouzzkitHttpView(HomeAssistantView):
     requires_auth = False
 
+    async def json_body(self, request: web.Request) -> dict:
+        """Parse the JSON body once, for check_sign and the handler."""
+        if KEY_BODY not in request:
+            request[KEY_BODY] = await request.json() or {}
+        return request[KEY_BODY]
+
     async def check_sign(self, request: web.Request, speak_id=None):
         hass = request.app[KEY_HASS]
         params = request.query
         if request.method in ("PUT", "POST"):
-            params = await request.json() or {}
+            params = await self.json_body(request)
         if not speak_id:
             speak_id = params.get("speak_id") or request.query.get("speak_id", "")
-        entry = None
-        for ent in hass.config_entries.async_loaded_entries(DOMAIN):
-            if speak_id == ent.data.get("speak_id"):
-                entry = ent
-                break
-        if not entry:
+        index = SpeakerIndex.get(hass)
+        entry = index.async_get_entry(speak_id)
+        if not entry or entry.state is not ConfigEntryState.LOADED:
             return None
         salt = request.headers.get("Salt", "")
-        ret = request.headers.get("Authorization") == calculate_sign(
+        if not verify_sign(
+            request.headers.get("Authorization"),
             request.path,
             params,
-            entry.data.get("mac", "").lower(),
+            index.async_get_sign_key(entry),
             salt,
-        )
-        return entry if ret else False
+        ):
+            return False
+        # A signed request is only accepted once
+        if not hass.data[DOMAIN]["sign_nonces"].add((entry.entry_id, salt)):
+            return False
+        return entry
 
 
 class HouzzkitSetupView(HouzzkitHttpView):
@@ -49,15 +118,15 @@ class HouzzkitSetupView(HouzzkitHttpView):
 
     async def post(self, request: web.Request):
         hass = request.app[KEY_HASS]
-        this_data = hass.data.setdefault(DOMAIN, {})
+        pending = PendingSetupStore.get(hass)
         if not (uuid := request.query.get("uuid")):
             return self.json_message("uuid missing")
-        if uuid not in this_data:
+        if uuid not in pending:
             return self.json_message("uuid invalid")
-        setup_data = await request.json() or {}
+        setup_data = await self.json_body(request)
         if not setup_data.get(CONF_HOST):
             return self.json_message("host missing")
-        this_data[uuid] = setup_data
+        pending.async_set(uuid, setup_data)
         return self.json_message("ok")
 
 class HouzzkitRemoveView(HouzzkitHttpView):
@@ -83,37 +152,152 @@ class HouzzkitSetNameView(HouzzkitHttpView):
         entry = await self.check_sign(request)
         if not entry:
             return self.json_message("params error")
-        data = await request.json() or {}
+        data = await self.json_body(request)
         if not (name := data.get("speak_name")):
             return self.json_message("speak_name missing")
-        mac = entry.data.get("mac")
-        device_registry = dr.async_get(hass)
-        device_entry = device_registry.async_get_device(
-            connections={(dr.CONNECTION_NETWORK_MAC, mac)},
-        )
-        if not device_entry:
+        if async_update_speaker(hass, entry, name) is None:
             return self.json_message("device not found")
-        device_registry.async_update_device(device_entry.id, name=name)
-        hass.config_entries.async_update_entry(entry, title=name)
         return self.json_message("ok")
 
 
-def calculate_sign(uri, params, mac, salt):
+@callback
+def async_get_speaker_device(hass: HomeAssistant, entry: ConfigEntry) -> dr.DeviceEntry | None:
+    """Return the device of a speaker."""
+    return dr.async_get(hass).async_get_device(
+        connections={(dr.CONNECTION_NETWORK_MAC, entry.data.get("mac"))},
+    )
+
+
+@callback
+def async_update_speaker(hass: HomeAssistant, entry: ConfigEntry, name: str | None = None, area_id: str | None = None) -> bool | None:
+    """Rename a speaker and move it to an area, None if its device is missing.
+
+    Returns whether anything changed. Unchanged fields are left alone, so
+    they don't fire registry events or schedule saves.
+    """
+    device_registry = dr.async_get(hass)
+    if not (device_entry := async_get_speaker_device(hass, entry)):
+        return None
+    changes = {}
+    if name and device_entry.name != name:
+        changes["name"] = name
+    if area_id and device_entry.area_id != area_id:
+        changes["area_id"] = area_id
+    if changes:
+        device_registry.async_update_device(device_entry.id, **changes)
+    if name and entry.title != name:
+        hass.config_entries.async_update_entry(entry, title=name)
+        return True
+    return bool(changes)
+
+class HouzzkitBulkSetupView(HouzzkitHttpView):
+    """Add many speakers at once.
+
+    Adding a speaker hands it control of the home, so this takes a Home
+    Assistant admin token instead of a speaker signature. devices is a list
+    of {host, port, noise_psk, speak_id, speak_name, mcp_endpoint}; the admin
+    caller is trusted with any ws or wss mcp_endpoint, as on a new site there
+    is no speaker yet to compare it with. Each device goes through its own config flow, at most
+    BULK_MAX_PARALLEL at a time, and gets a status in the response.
     """
-    签名算法:
-    1. n = md5(uri)
-    2. 拼接参数字符串并计算 m = md5(参数字符串)
-    3. response = md5(m + n + mac + salt)
+    url = "/api/houzzkit-ai/setup/bulk"
+    name = "api:houzzkit-ai:setup-bulk"
+    requires_auth = True
+
+    @require_admin
+    async def post(self, request: web.Request):
+        hass = request.app[KEY_HASS]
+        data = await self.json_body(request)
+        devices = data.get("devices")
+        if not isinstance(devices, list) or not devices:
+            return self.json_message("devices missing")
+        if len(devices) > BULK_MAX_DEVICES:
+            return self.json_message(f"at most {BULK_MAX_DEVICES} devices")
+
+        semaphore = asyncio.Semaphore(BULK_MAX_PARALLEL)
+        hosts = set()
+
+        async def provision(device) -> dict:
+            try:
+                device = BULK_DEVICE_SCHEMA(device)
+            except vol.Invalid as err:
+                return {"status": "error", "reason": f"invalid device: {err}"}
+            result = {
+                CONF_HOST: device[CONF_HOST],
+                "speak_id": device.get("speak_id"),
+            }
+            # Same MAC behind another host is caught by the flow's unique id
+            if device[CONF_HOST] in hosts:
+                return {**result, "status": "error", "reason": "duplicate"}
+            hosts.add(device[CONF_HOST])
+            async with semaphore:
+                try:
+                    flow = await hass.config_entries.flow.async_init(
+                        DOMAIN, context={"source": SOURCE_BULK}, data=device
+                    )
+                except Exception as err:
+                    _LOGGER.exception("Bulk setup of %s failed", device[CONF_HOST])
+                    return {**result, "status": "error", "reason": str(err)}
+            if flow["type"] is FlowResultType.CREATE_ENTRY:
+                return {**result, "status": "created", "entry_id": flow["result"].entry_id}
+            if flow["type"] is FlowResultType.ABORT:
+                if flow["reason"].startswith("already_configured"):
+                    return {**result, "status": "already_configured"}
+                if flow["reason"] == "already_in_progress":
+                    return {**result, "status": "error", "reason": "duplicate"}
+                return {**result, "status": "error", "reason": flow["reason"]}
+            # A password or a name conflict needs a person, leave those to the QR flow
+            hass.config_entries.flow.async_abort(flow["flow_id"])
+            return {**result, "status": "error", "reason": flow.get("step_id")}
+
+        results = await asyncio.gather(*(provision(device) for device in devices))
+        return self.json({"message": "ok", "results": results})
+
+
+class HouzzkitBatchUpdateView(HouzzkitHttpView):
+    """Rename many speakers and move them to areas at once.
+
+    Takes a Home Assistant admin token like the bulk setup, since it touches
+    every speaker. updates is a list of {speak_id, speak_name, area}, area
+    being an area name that is created if missing. The whole list is
+    validated before any update is applied, then all are applied in one go
+    without awaiting in between, so the delayed saves of the registries and
+    config entries each write once for the whole batch.
     """
-    # 步骤1: 计算 n = md5(uri)
-    n = hashlib.md5(uri.encode('utf-8')).hexdigest()
-
-    # 步骤2: 拼接参数并计算 m = md5(参数字符串)
-    # 将参数排序后拼接为 key=value 格式
-    sorted_params = sorted(params.items(), key=lambda x: x[0])
-    param_str = '&'.join([f"{k}={v}" for k, v in sorted_params])
-    m = hashlib.md5(param_str.encode('utf-8')).hexdigest()
-
-    # 步骤3: 计算最终摘要
-    response_str = f"{m}{n}{mac}{salt}"
-    return hashlib.md5(response_str.encode('utf-8')).hexdigest()
+    url = "/api/houzzkit-ai/update/batch"
+    name = "api:houzzkit-ai:update:batch"
+    requires_auth = True
+
+    @require_admin
+    async def post(self, request: web.Request):
+        hass = request.app[KEY_HASS]
+        data = await self.json_body(request)
+        try:
+            updates = BATCH_UPDATES_SCHEMA(data.get("updates"))
+        except vol.Invalid as err:
+            return self.json_message(f"updates invalid: {err}")
+
+        index = SpeakerIndex.get(hass)
+        area_registry = ar.async_get(hass)
+        area_ids: dict[str, str] = {}
+        results = []
+        for update in updates:
+            result = {"speak_id": update["speak_id"]}
+            results.append(result)
+            if not (entry := index.async_get_entry(update["speak_id"])):
+                result.update(status="error", reason="speaker not found")
+                continue
+            # Checked before the area is created, so a miss leaves no empty area
+            if not async_get_speaker_device(hass, entry):
+                result.update(status="error", reason="device not found")
+                continue
+            area_id = None
+            if area := update.get("area"):
+                if (area_id := area_ids.get(area)) is None:
+                    area_entry = area_registry.async_get_area_by_name(area)
+                    if area_entry is None:
+                        area_entry = area_registry.async_create(area)
+                    area_id = area_ids[area] = area_entry.id
+            changed = async_update_speaker(hass, entry, update.get("speak_name"), area_id)
+            result["status"] = "updated" if changed else "unchanged"
+        return self.json({"message": "ok", "results": results})
@@ -0,0 +1,44 @@
+"""Encode and decode the JSON-RPC messages of the MCP websocket.
+
+Frames are validated straight from the raw text with pydantic's JSON parser,
+which skips building an intermediate dict. Messages are only turned into text
+for logging when debug logging is enabled.
+"""
+import logging
+
+from mcp import types
+
+# Characters of a message kept in debug logs
+LOG_PREVIEW_SIZE = 2048
+
+
+def decode_message(data: str | bytes) -> types.JSONRPCMessage:
+    """Parse and validate a JSON-RPC message from a websocket frame."""
+    return types.JSONRPCMessage.model_validate_json(data)
+
+
+def encode_message(message: types.JSONRPCMessage) -> str:
+    """Serialize a JSON-RPC message for a websocket frame."""
+    return message.model_dump_json(by_alias=True, exclude_none=True)
+
+
+def describe_message(message: types.JSONRPCMessage) -> str:
+    """Return a short description of a message: its kind, id and method."""
+    root = message.root
+    parts = [type(root).__name__]
+    if (msg_id := getattr(root, "id", None)) is not None:
+        parts.append(f"id={msg_id}")
+    if method := getattr(root, "method", None):
+        parts.append(method)
+    return " ".join(parts)
+
+
+def log_message(logger: logging.Logger, direction: str, message: types.JSONRPCMessage, text: str):
+    """Log a message at debug level, truncating large payloads."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    preview = text if len(text) <= LOG_PREVIEW_SIZE else f"{text[:LOG_PREVIEW_SIZE]}..."
+    logger.debug(
+        "mcp %s: %s (%s bytes) %s",
+        direction, describe_message(message), len(text), preview,
+    )
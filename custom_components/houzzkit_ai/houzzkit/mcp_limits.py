@@ -0,0 +1,110 @@
+"""Size limit of the tool results sent over the MCP websocket.
+
+Tool results carry JSON in their text content, so oversized texts are cut
+down structurally: long lists lose their last items and long strings their
+end, then the JSON is serialized again and stays valid. Text which isn't
+JSON is cut and says how much was left out. A tool whose results need
+another summary registers its own hook, truncate_text_content stays the
+default for the others.
+"""
+from collections.abc import Callable
+import json
+from typing import Any
+
+# Max bytes of one encoded tool result
+DEFAULT_MAX_TOOL_RESULT_SIZE = 64 * 1024
+# Room kept for the JSON-RPC envelope and the truncation notes
+_ENVELOPE_SIZE = 512
+_NOTE_SIZE = 48
+
+type TruncationHook = Callable[[dict[str, Any], int], dict[str, Any]]
+
+_hooks: dict[str, TruncationHook] = {}
+
+
+def register_truncation_hook(tool: str, hook: TruncationHook):
+    """Shrink oversized results of a tool with hook(result, max_bytes).
+
+    The hook returns result itself when it leaves it as is.
+    """
+    _hooks[tool] = hook
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value).encode())
+
+
+def _shrink(value: Any, budget: int) -> Any:
+    """Return value cut down to serialize to about budget bytes."""
+    size = _json_size(value)
+    if size <= budget:
+        return value
+    if isinstance(value, str):
+        keep = len(value) * max(budget - _NOTE_SIZE, 0) // size
+        return f"{value[:keep]}...[truncated {len(value) - keep} chars]"
+    if isinstance(value, list):
+        kept = []
+        used = 2
+        for item in value:
+            item_size = _json_size(item) + 2
+            if used + item_size > budget - _NOTE_SIZE:
+                break
+            kept.append(item)
+            used += item_size
+        return [*kept, f"...[truncated {len(value) - len(kept)} items]"]
+    if isinstance(value, dict):
+        sizes = {key: _json_size(item) for key, item in value.items()}
+        excess = size - budget
+        shrunk = dict(value)
+        # The largest fields give up their excess first
+        for key in sorted(sizes, key=sizes.__getitem__, reverse=True):
+            if excess <= 0:
+                break
+            shrunk[key] = _shrink(value[key], max(sizes[key] - excess, _NOTE_SIZE))
+            excess -= sizes[key] - _json_size(shrunk[key])
+        return shrunk
+    return value
+
+
+def _truncate_text(text: str, budget: int) -> str:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, (dict, list)):
+        return json.dumps(_shrink(data, budget))
+    encoded = text.encode()
+    cut = encoded[:max(budget - _NOTE_SIZE, 0)].decode(errors="ignore")
+    return f"{cut}\n...[truncated {len(encoded) - len(cut.encode())} bytes]"
+
+
+def truncate_text_content(result: dict[str, Any], max_bytes: int) -> dict[str, Any]:
+    """Cut the text content of a tool result to about max_bytes in total.
+
+    Returns result itself when there was nothing to cut.
+    """
+    content = result.get("content") or []
+    texts = {
+        id(item): item for item in content
+        if isinstance(item, dict) and item.get("type") == "text"
+    }
+    total = sum(len(item.get("text", "").encode()) for item in texts.values())
+    budget = max(max_bytes - _ENVELOPE_SIZE, 0)
+    if not texts or total <= budget:
+        return result
+
+    truncated = []
+    for item in content:
+        if id(item) in texts:
+            text = item.get("text", "")
+            # Each text keeps its share of the budget
+            share = len(text.encode()) * budget // total
+            item = {**item, "text": _truncate_text(text, share)}
+        truncated.append(item)
+    return {**result, "content": truncated}
+
+
+def limit_tool_result(tool: str, result: dict[str, Any], max_bytes: int) -> dict[str, Any]:
+    """Return the result shrunk by the hook of the tool."""
+    hook = _hooks.get(tool, truncate_text_content)
+    return hook(result, max_bytes)
@@ -0,0 +1,173 @@
+"""Request, latency and heartbeat metrics of an MCP transport.
+
+Latency is the time from a request being read from the websocket to its
+response being written back, so it covers the tool execution in Home
+Assistant but not the upstream or the network. The heartbeat round trip
+time covers the network and the upstream.
+"""
+import bisect
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from mcp import types
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+# Requests without a response after this long are dropped from tracking
+PENDING_TIMEOUT = 300
+
+_PING_PAYLOAD = struct.Struct("!d")
+
+
+def ping_payload() -> bytes:
+    """Return a ping payload holding the time it is sent."""
+    return _PING_PAYLOAD.pack(time.monotonic())
+
+
+def pong_rtt(payload: bytes) -> float | None:
+    """Return the round trip time of the pong of a ping_payload()."""
+    if len(payload) != _PING_PAYLOAD.size:
+        return None
+    return time.monotonic() - _PING_PAYLOAD.unpack(payload)[0]
+
+
+@dataclass(slots=True)
+class LatencyHistogram:
+    """Latencies counted in fixed buckets."""
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Return the upper bound of the bucket holding the q-th percentile."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+@dataclass(slots=True)
+class _PendingRequest:
+    start: float
+    method: str
+    tool: str | None
+
+
+class McpMetrics:
+    """Per-method and per-tool request counts and latencies of a transport."""
+
+    def __init__(self):
+        self.requests: dict[str, int] = {}
+        self.tool_calls: dict[str, int] = {}
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.method_latency: dict[str, LatencyHistogram] = {}
+        self.tool_latency: dict[str, LatencyHistogram] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.oversized_results = 0
+        self.oversized_bytes = 0
+        self.heartbeat_rtt: float | None = None
+        self.heartbeat_rtt_max: float | None = None
+        self._pending: dict[Any, _PendingRequest] = {}
+
+    def record_in(self, message: types.JSONRPCMessage, size: int):
+        """Count a message from the websocket and start timing requests."""
+        self.bytes_in += size
+        root = message.root
+        if not isinstance(root, types.JSONRPCRequest):
+            return
+        tool = None
+        if root.method == "tools/call" and root.params:
+            tool = root.params.get("name")
+            self.tool_calls[tool] = self.tool_calls.get(tool, 0) + 1
+        self.requests[root.method] = self.requests.get(root.method, 0) + 1
+        now = time.monotonic()
+        if len(self._pending) > 100:
+            self._expire(now)
+        self._pending[root.id] = _PendingRequest(now, root.method, tool)
+
+    def record_out(self, message: types.JSONRPCMessage, size: int):
+        """Count a message to the websocket and time the request it answers."""
+        self.bytes_out += size
+        root = message.root
+        if isinstance(root, types.JSONRPCError):
+            self.errors += 1
+        elif not isinstance(root, types.JSONRPCResponse):
+            return
+        if (pending := self._pending.pop(root.id, None)) is None:
+            return
+        seconds = time.monotonic() - pending.start
+        self.latency.record(seconds)
+        self.method_latency.setdefault(pending.method, LatencyHistogram()).record(seconds)
+        if pending.tool:
+            self.tool_latency.setdefault(pending.tool, LatencyHistogram()).record(seconds)
+
+    def pending_tool(self, msg_id: Any) -> str | None:
+        """Return the tool called by a request waiting for its response."""
+        if pending := self._pending.get(msg_id):
+            return pending.tool
+        return None
+
+    def record_oversized(self, size: int, limited_size: int):
+        self.oversized_results += 1
+        self.oversized_bytes += size - limited_size
+
+    def record_rtt(self, seconds: float):
+        self.heartbeat_rtt = seconds
+        if self.heartbeat_rtt_max is None or seconds > self.heartbeat_rtt_max:
+            self.heartbeat_rtt_max = seconds
+
+    def _expire(self, now: float):
+        for msg_id, pending in list(self._pending.items()):
+            if now - pending.start > PENDING_TIMEOUT:
+                del self._pending[msg_id]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "tool_calls": dict(self.tool_calls),
+            "errors": self.errors,
+            "pending": len(self._pending),
+            "latency": self.latency.as_dict(),
+            "method_latency": {
+                method: histogram.as_dict()
+                for method, histogram in self.method_latency.items()
+            },
+            "tool_latency": {
+                tool: histogram.as_dict()
+                for tool, histogram in self.tool_latency.items()
+            },
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "oversized_results": self.oversized_results,
+            "oversized_bytes": self.oversized_bytes,
+            "heartbeat_rtt": self.heartbeat_rtt,
+            "heartbeat_rtt_max": self.heartbeat_rtt_max,
+        }
@@ -0,0 +1,191 @@
+"""Connections of the MCP transports, pooled per upstream host.
+
+All speakers talking to the same host share one aiohttp ClientSession, so
+DNS lookups, TLS sessions and connectors are reused, and a single scheduler
+pings every open websocket instead of one heartbeat task per speaker.
+
+Handshakes of all speakers go through one token bucket, so they are spread
+out after an outage instead of hitting the upstream at once.
+"""
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import aiohttp
+from yarl import URL
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from ..const import DOMAIN
+from .mcp_metrics import ping_payload
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_MCP_POOL = "mcp_pool"
+HEARTBEAT_INTERVAL = timedelta(seconds=55)
+CONNECT_TIMEOUT = 60
+
+# Handshakes per second over all speakers, with bursts of HANDSHAKE_BURST
+HANDSHAKE_RATE = 2.0
+HANDSHAKE_BURST = 4
+# Reconnect backoff, in seconds
+RETRY_BASE = 1.0
+RETRY_CAP = 60.0
+
+
+def retry_delay(previous: float) -> float:
+    """Return the next reconnect delay, with decorrelated jitter."""
+    return min(RETRY_CAP, random.uniform(RETRY_BASE, max(previous, RETRY_BASE) * 3))
+
+
+def host_key(endpoint: str) -> str:
+    """Return the scheme, host and port of an endpoint."""
+    url = URL(endpoint)
+    return f"{url.scheme}://{url.host}:{url.port}"
+
+
+class TokenBucket:
+    """Allow rate acquisitions per second, and bursts of burst."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.throttled = 0
+
+    async def async_acquire(self):
+        # The lock keeps waiters in order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                self.throttled += 1
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class McpConnectionPool:
+    """Client sessions per host and the heartbeat of all websockets."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        self._refs: dict[str, int] = {}
+        self._websockets: set[aiohttp.ClientWebSocketResponse] = set()
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._retry_waiters: dict[str, set[asyncio.Future]] = {}
+        self.handshakes = TokenBucket(HANDSHAKE_RATE, HANDSHAKE_BURST)
+
+    @classmethod
+    @callback
+    def get(cls, hass: HomeAssistant) -> "McpConnectionPool":
+        """Get the pool stored in hass.data, creating it on first use."""
+        this_data = hass.data.setdefault(DOMAIN, {})
+        if (pool := this_data.get(DATA_MCP_POOL)) is None:
+            pool = this_data[DATA_MCP_POOL] = cls(hass)
+            pool.async_start()
+        return pool
+
+    @callback
+    def async_start(self):
+        self._unsubs = [
+            async_track_time_interval(
+                self.hass, self._async_heartbeat, HEARTBEAT_INTERVAL,
+                name="houzzkit mcp heartbeat",
+            ),
+        ]
+        # Not kept in _unsubs, it's already removed once it fires
+        self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    async def _async_stop(self, _event: Event | None = None):
+        while self._unsubs:
+            self._unsubs.pop()()
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        self._refs.clear()
+        for session in sessions:
+            await session.close()
+
+    @asynccontextmanager
+    async def async_session(self, endpoint: str):
+        """Borrow the client session of the endpoint's host."""
+        key = host_key(endpoint)
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            session = self._sessions[key] = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=CONNECT_TIMEOUT)
+            )
+            _LOGGER.debug("mcp client session opened for %s", key)
+        self._refs[key] = self._refs.get(key, 0) + 1
+        try:
+            yield session
+        finally:
+            self._refs[key] = self._refs.get(key, 1) - 1
+
+    async def async_connect(self, session: aiohttp.ClientSession, endpoint: str) -> aiohttp.ClientWebSocketResponse:
+        """Open a websocket once the handshake bucket allows it."""
+        await self.handshakes.async_acquire()
+        # compress negotiates permessage-deflate, servers without it ignore the offer
+        return await session.ws_connect(endpoint, autoping=False, compress=15)
+
+    async def async_wait_retry(self, endpoint: str, delay: float):
+        """Sleep before a reconnect, or until another speaker got through to the host."""
+        waiters = self._retry_waiters.setdefault(host_key(endpoint), set())
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.add(waiter)
+        try:
+            async with asyncio.timeout(delay):
+                await waiter
+        except TimeoutError:
+            pass
+        finally:
+            waiters.discard(waiter)
+
+    @callback
+    def async_connected(self, endpoint: str):
+        """Wake the speakers waiting to reconnect to the same host."""
+        for waiter in self._retry_waiters.pop(host_key(endpoint), ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @callback
+    def async_add_websocket(self, ws: aiohttp.ClientWebSocketResponse):
+        self._websockets.add(ws)
+
+    @callback
+    def async_remove_websocket(self, ws: aiohttp.ClientWebSocketResponse):
+        self._websockets.discard(ws)
+
+    @callback
+    def _async_heartbeat(self, _now: datetime):
+        for ws in list(self._websockets):
+            if ws.closed:
+                self._websockets.discard(ws)
+                continue
+            self.hass.async_create_background_task(
+                self._async_ping(ws), "houzzkit mcp ping", eager_start=True
+            )
+        # Close the sessions of hosts nobody has connected to since the last beat
+        for key, refs in list(self._refs.items()):
+            if refs == 0:
+                del self._refs[key]
+                if session := self._sessions.pop(key, None):
+                    self.hass.async_create_background_task(
+                        session.close(), "houzzkit mcp session close"
+                    )
+
+    async def _async_ping(self, ws: aiohttp.ClientWebSocketResponse):
+        try:
+            await ws.ping(ping_payload())
+        except Exception as err:
+            _LOGGER.error("mcp heartbeat ping failed: %s", err)
@@ -0,0 +1,246 @@
+"""MCP servers shared by the transports of all speakers.
+
+The server built by mcp_server holds no per-connection state, so one server
+per (LLM API, language) serves every websocket. Its tool and prompt lists are
+cached, and rebuilt when the exposed entities, registries or loaded
+integrations change, or after CACHE_TTL seconds.
+
+Identical calls of read-only tools running at the same time share one
+execution, and their result is reused for TOOL_RESULT_TTL seconds unless an
+exposed entity changes state first.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from mcp import types
+from mcp.server import Server
+from mcp.server.models import InitializationOptions
+
+from homeassistant.const import EVENT_COMPONENT_LOADED, EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry as ar,
+    entity_registry as er,
+    floor_registry as fr,
+    llm,
+)
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant import async_should_expose
+from homeassistant.components.homeassistant.exposed_entities import (
+    async_listen_entity_updates,
+)
+from homeassistant.components.mcp_server.server import create_server
+
+from ..const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_MCP_SHARED = "mcp_shared"
+SERVER_VERSION = "2.0.1"
+# Rebuild the cached lists at least this often, e.g. for new intents
+CACHE_TTL = 600
+
+# Requests whose results only depend on the LLM API and exposed entities
+CACHED_REQUESTS = (types.ListToolsRequest, types.ListPromptsRequest)
+
+# Tools which only read the state of the home, and how long their result is reused
+READ_ONLY_TOOLS = {"GetLiveContext", "HouzzkitGetLiveContext"}
+TOOL_RESULT_TTL = 2
+
+# Given to the waiters of a computation whose caller was cancelled
+_LEADER_CANCELLED = object()
+
+
+class SingleFlightCache:
+    """Results kept for ttl seconds, computed once per key at a time."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        # Bumped on clear, so results computed before it aren't kept
+        self._generation = 0
+        self.hits = 0
+        self.coalesced = 0
+
+    def __bool__(self) -> bool:
+        return bool(self._results or self._pending)
+
+    def clear(self):
+        self._results.clear()
+        self._pending.clear()
+        self._generation += 1
+
+    async def async_get(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda result: True,
+    ) -> Any:
+        coalesced = False
+        while True:
+            now = time.monotonic()
+            cached = self._results.get(key)
+            if cached and now - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1]
+            if (future := self._pending.get(key)) is None:
+                break
+            if not coalesced:
+                coalesced = True
+                self.coalesced += 1
+            result = await asyncio.shield(future)
+            if result is not _LEADER_CANCELLED:
+                return result
+            # The caller computing it went away, the first waiter takes over
+
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        try:
+            result = await factory()
+        except Exception as err:
+            self._done(key, future)
+            future.set_exception(err)
+            # Don't warn when nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            # Cancellation is only the leader's, the waiters retry instead
+            self._done(key, future)
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        self._done(key, future)
+        future.set_result(result)
+        if generation == self._generation and cacheable(result):
+            self._results[key] = (now, result)
+        return result
+
+    def _done(self, key: Hashable, future: asyncio.Future):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+
+@dataclass
+class SharedServer:
+    server: Server
+    options: InitializationOptions
+    lists: SingleFlightCache = field(default_factory=lambda: SingleFlightCache(CACHE_TTL))
+    tools: SingleFlightCache = field(default_factory=lambda: SingleFlightCache(TOOL_RESULT_TTL))
+
+
+class McpServerCache:
+    """Servers and their tool/prompt lists per (llm_api_id, language)."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._servers: dict[tuple[Any, str], SharedServer] = {}
+        self._locks: dict[tuple[Any, str], asyncio.Lock] = {}
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self.builds = 0
+
+    @classmethod
+    @callback
+    def get(cls, hass: HomeAssistant) -> "McpServerCache":
+        """Get the cache stored in hass.data, creating it on first use."""
+        this_data = hass.data.setdefault(DOMAIN, {})
+        if (cache := this_data.get(DATA_MCP_SHARED)) is None:
+            cache = this_data[DATA_MCP_SHARED] = cls(hass)
+            cache.async_start()
+        return cache
+
+    @callback
+    def async_start(self):
+        bus = self.hass.bus
+        self._unsubs = [
+            bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_invalidate),
+            bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, self._async_invalidate),
+            bus.async_listen(fr.EVENT_FLOOR_REGISTRY_UPDATED, self._async_invalidate),
+            bus.async_listen(EVENT_COMPONENT_LOADED, self._async_invalidate),
+            bus.async_listen(EVENT_STATE_CHANGED, self._async_state_changed),
+            async_listen_entity_updates(
+                self.hass, conversation.DOMAIN, self._async_invalidate
+            ),
+        ]
+
+    @callback
+    def async_stop(self):
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._servers.clear()
+
+    @callback
+    def _async_invalidate(self, _event: Event | None = None):
+        for shared in self._servers.values():
+            shared.lists.clear()
+            shared.tools.clear()
+
+    @callback
+    def _async_state_changed(self, event: Event):
+        cached = [shared.tools for shared in self._servers.values() if shared.tools]
+        if cached and async_should_expose(
+            self.hass, conversation.DOMAIN, event.data["entity_id"]
+        ):
+            for tools in cached:
+                tools.clear()
+
+    async def async_get_server(self, llm_api_id: str | list[str], language: str) -> SharedServer:
+        """Return the server of an LLM API, creating it once for all callers."""
+        api_key = tuple(llm_api_id) if isinstance(llm_api_id, list) else llm_api_id
+        key = (api_key, language)
+        if shared := self._servers.get(key):
+            return shared
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if shared := self._servers.get(key):
+                return shared
+            context = llm.LLMContext(
+                platform=DOMAIN,
+                context=None,
+                language=language,
+                assistant=conversation.DOMAIN,
+                device_id=None,
+            )
+            server = await create_server(self.hass, llm_api_id, context)
+            server.version = SERVER_VERSION
+            options = await self.hass.async_add_executor_job(server.create_initialization_options)
+            shared = self._servers[key] = SharedServer(server, options)
+            self._wrap_handlers(shared)
+            self.builds += 1
+            _LOGGER.debug("mcp server created for %s", key)
+            return shared
+
+    def _wrap_handlers(self, shared: SharedServer):
+        """Serve the list requests and read-only tool calls from the caches."""
+        handlers = shared.server.request_handlers
+        for request_type in CACHED_REQUESTS:
+            if handler := handlers.get(request_type):
+                handlers[request_type] = self._cached_list_handler(shared, request_type, handler)
+        if handler := handlers.get(types.CallToolRequest):
+            handlers[types.CallToolRequest] = self._cached_tool_handler(shared, handler)
+
+    @staticmethod
+    def _cached_list_handler(shared: SharedServer, request_type: type, handler):
+        async def _async_handle(request):
+            # Speakers reconnecting together wait for a single build
+            return await shared.lists.async_get(request_type, lambda: handler(request))
+
+        return _async_handle
+
+    @staticmethod
+    def _cached_tool_handler(shared: SharedServer, handler):
+        async def _async_handle(request: types.CallToolRequest):
+            name = request.params.name
+            if name not in READ_ONLY_TOOLS:
+                return await handler(request)
+            key = (name, json.dumps(request.params.arguments, sort_keys=True, default=str))
+            return await shared.tools.async_get(
+                key,
+                lambda: handler(request),
+                cacheable=lambda result: not getattr(result.root, "isError", False),
+            )
+
+        return _async_handle
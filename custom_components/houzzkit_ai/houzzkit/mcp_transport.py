@@ -1,7 +1,10 @@
+import time
+import asyncio
 import logging
 import anyio
-import asyncio
 import aiohttp
+from dataclasses import asdict, dataclass
+from typing import Any
 from mcp import types
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
@@ -9,11 +12,14 @@ from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_LLM_HASS_API
 from homeassistant.helpers import llm
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
-from homeassistant.components import conversation
-from homeassistant.components.mcp_server.server import create_server
 from homeassistant.components.mcp_server.session import Session, SessionManager
 
-from ..const import DOMAIN
+from ..const import CONF_MAX_TOOL_RESULT_SIZE, DOMAIN
+from .mcp_pool import McpConnectionPool, retry_delay
+from .mcp_shared import McpServerCache
+from .mcp_codec import decode_message, encode_message, log_message
+from .mcp_limits import DEFAULT_MAX_TOOL_RESULT_SIZE, limit_tool_result
+from .mcp_metrics import McpMetrics, pong_rtt
 
 try:
     from mcp.shared.message import SessionMessage  # ha>=2025.10,mcp>=1.14.1
@@ -23,12 +29,18 @@ except (ImportError, ModuleNotFoundError):
 
 _LOGGER = logging.getLogger(__name__)
 
+# Messages buffered in each direction between the websocket and the MCP server
+DEFAULT_BUFFER_SIZE = 64
+# Max seconds to close a transport, and to wait for a new endpoint to connect
+STOP_TIMEOUT = 5
+HANDOVER_TIMEOUT = 15
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up MCP Server from a config entry."""
     entry_data = await async_remove_entry(hass, entry)
     transport = McpTransport(hass, entry)
-    hass.async_create_task(transport.run_connection_loop())
+    transport.start()
     entry_data["transport"] = transport
 
     for ent in hass.config_entries.async_loaded_entries(DOMAIN):
@@ -41,7 +53,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         if ent.state not in [ConfigEntryState.LOADED, ConfigEntryState.FAILED_UNLOAD]:
             continue
         _LOGGER.info("Entry mcp endpoint changed: %s", endpoint)
-        transport.set_endpoint(endpoint)
+        hass.async_create_background_task(
+            async_swap_endpoint(hass, ent, endpoint),
+            f"houzzkit mcp endpoint swap {ent.entry_id}",
+        )
         hass.config_entries.async_update_entry(ent, data={
             **ent.data,
             "mcp_endpoint": endpoint,
@@ -49,6 +64,23 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     return True
 
+def get_transport(hass: HomeAssistant, entry_id: str) -> "McpTransport | None":
+    return hass.data.get(DOMAIN, {}).get(entry_id, {}).get("transport")
+
+
+async def async_swap_endpoint(hass: HomeAssistant, entry: ConfigEntry, endpoint: str):
+    """Move an entry to a new endpoint, connecting before closing the old one."""
+    entry_data = hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})
+    old = entry_data.get("transport")
+    transport = McpTransport(hass, entry, endpoint=endpoint)
+    transport.start()
+    entry_data["transport"] = transport
+    if not await transport.async_wait_connected(HANDOVER_TIMEOUT):
+        _LOGGER.warning("mcp new endpoint not connected after %ss, closing the old one anyway", HANDOVER_TIMEOUT)
+    if old:
+        await old.stop()
+
+
 async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
     entry_data = hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})
     if transport := entry_data.pop("transport", None):
@@ -56,6 +88,59 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
     return entry_data
 
 
+@dataclass(slots=True)
+class McpStreamStats:
+    """Depth and wait time of one direction of the transport."""
+    messages: int = 0
+    depth_max: int = 0
+    waits: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def record(self, depth: int, wait: float = 0.0):
+        self.messages += 1
+        self.depth_max = max(self.depth_max, depth)
+        if wait > 0:
+            self.waits += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    async def async_send(self, stream: MemoryObjectSendStream, message):
+        """Send to the stream, counting the time spent waiting for room."""
+        wait = 0.0
+        try:
+            stream.send_nowait(message)
+        except anyio.WouldBlock:
+            start = time.monotonic()
+            await stream.send(message)
+            wait = time.monotonic() - start
+        self.record(stream.statistics().current_buffer_used, wait)
+
+
+@dataclass(slots=True)
+class McpTransportStats:
+    """Counters of the messages to (recv) and from (send) the MCP server.
+
+    The send wait is the time spent writing responses to the websocket.
+    """
+    recv: McpStreamStats
+    send: McpStreamStats
+    # Connection attempts, successful handshakes and the time to get back online
+    attempts: int = 0
+    successes: int = 0
+    reconnect_last: float | None = None
+    reconnect_max: float | None = None
+
+    def record_connected(self, disconnected_at: float | None):
+        self.successes += 1
+        if disconnected_at is None:
+            return
+        seconds = time.monotonic() - disconnected_at
+        self.reconnect_last = seconds
+        if self.reconnect_max is None or seconds > self.reconnect_max:
+            self.reconnect_max = seconds
+
+
 class McpTransport:
     """Handles WebSocket transport for MCP server."""
     endpoint = None
@@ -67,29 +152,79 @@ class McpTransport:
     _recv_reader: MemoryObjectReceiveStream = None
     _send_writer: MemoryObjectSendStream = None
     _send_reader: MemoryObjectReceiveStream = None
+    _retry_delay = 0.0
+    _retry_after: float | None = None
+    _disconnected_at: float | None = None
+    _task: asyncio.Task | None = None
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        max_tool_result_size: int | None = None,
+        endpoint: str | None = None,
+    ):
         self.hass = hass
         self.entry = entry
+        self.buffer_size = buffer_size
+        self.max_tool_result_size = max_tool_result_size or entry.options.get(
+            CONF_MAX_TOOL_RESULT_SIZE, DEFAULT_MAX_TOOL_RESULT_SIZE
+        )
+        self.stats = McpTransportStats(McpStreamStats(), McpStreamStats())
+        self.metrics = McpMetrics()
         entry_data = hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})
         self.session_manager = entry_data.setdefault("session_manager", SessionManager())
-        self.endpoint = entry.data.get("mcp_endpoint")
+        self.endpoint = endpoint or entry.data.get("mcp_endpoint")
+        self._connected = asyncio.Event()
 
-    def set_endpoint(self, endpoint):
-        self.should_reconnect = False
-        self.endpoint = endpoint
-        self.reconnect_times = 0
-        self.should_reconnect = True
+    def start(self):
+        self._task = self.hass.async_create_background_task(
+            self.run_connection_loop(), f"houzzkit mcp {self.entry.entry_id}"
+        )
 
-    async def _create_server(self, context: llm.LLMContext):
-        """Create MCP server instance."""
+    async def async_wait_connected(self, timeout: float) -> bool:
+        try:
+            async with asyncio.timeout(timeout):
+                await self._connected.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    async def _create_server(self):
+        """Get the MCP server shared with the other speakers."""
         llm_api_id = self.entry.data.get(CONF_LLM_HASS_API) or llm.LLM_API_ASSIST
-        return await create_server(self.hass, llm_api_id, context)
+        return await McpServerCache.get(self.hass).async_get_server(llm_api_id, "*")
 
     async def _create_streams(self):
-        """Create memory object streams for communication."""
-        self._recv_writer, self._recv_reader = anyio.create_memory_object_stream(0)
-        self._send_writer, self._send_reader = anyio.create_memory_object_stream(0)
+        """Create memory object streams for communication.
+
+        The buffers decouple the websocket from the server: the reader keeps
+        reading while a request is being handled, and the server doesn't wait
+        for each response to be written. The server handles every request in
+        its own task, so a slow tool call doesn't hold up the others.
+        """
+        self._recv_writer, self._recv_reader = anyio.create_memory_object_stream(self.buffer_size)
+        self._send_writer, self._send_reader = anyio.create_memory_object_stream(self.buffer_size)
+
+    def diagnostics(self) -> dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "stats": asdict(self.stats),
+            "queue_depth": self.queue_depth(),
+            "metrics": self.metrics.as_dict(),
+        }
+
+    @property
+    def connected(self) -> bool:
+        return self._current_ws is not None and not self._current_ws.closed
+
+    def queue_depth(self) -> dict[str, int]:
+        """Return the messages currently buffered in each direction."""
+        return {
+            name: stream.statistics().current_buffer_used if stream else 0
+            for name, stream in (("recv", self._recv_writer), ("send", self._send_writer))
+        }
 
     async def run_connection_loop(self) -> None:
         """Run the connection loop with automatic reconnection."""
@@ -101,11 +236,18 @@ class McpTransport:
             except Exception as err:
                 _LOGGER.warning("mcp websocket disconnected or failed: %s", err)
             if self.should_reconnect:
-                seconds = max(min(60, self.reconnect_times * 5), 1)
-                _LOGGER.info("mcp websocket retry after %s seconds", seconds)
+                if self._disconnected_at is None:
+                    self._disconnected_at = time.monotonic()
+                self._retry_delay = retry_delay(self._retry_delay)
+                if self._retry_after:
+                    # The upstream asked us to back off
+                    self._retry_delay = max(self._retry_delay, self._retry_after)
+                    self._retry_after = None
+                _LOGGER.info("mcp websocket retry after %.1f seconds", self._retry_delay)
                 self.reconnect_times += 1
-                if seconds > 0:
-                    await asyncio.sleep(seconds)
+                await McpConnectionPool.get(self.hass).async_wait_retry(
+                    self.endpoint, self._retry_delay
+                )
 
     async def connect_to_client(self) -> bool:
         """Connect to external WebSocket endpoint as MCP server."""
@@ -115,16 +257,9 @@ class McpTransport:
 
         _LOGGER.debug("mcp websocket connect_to_client")
         try:
-            context = llm.LLMContext(
-                platform=DOMAIN,
-                context=None,
-                language="*",
-                assistant=conversation.DOMAIN,
-                device_id=None,
-            )
-            self._mcp_server = await self._create_server(context)
-            self._mcp_server.version = "2.0.1"
-            options = await self.hass.async_add_executor_job(self._mcp_server.create_initialization_options)
+            shared = await self._create_server()
+            self._mcp_server = shared.server
+            options = shared.options
 
             await self._create_streams()
 
@@ -140,25 +275,40 @@ class McpTransport:
     async def _establish_websocket_connection(self, options: dict):
         """Establish WebSocket connection and run server tasks."""
         _LOGGER.info("mcp Connecting to MCP client at: %s", self.endpoint)
-        timeout = aiohttp.ClientTimeout(total=60)
+        pool = McpConnectionPool.get(self.hass)
 
-        async with aiohttp.ClientSession(timeout=timeout) as client_session:
+        async with pool.async_session(self.endpoint) as client_session:
             try:
-                async with client_session.ws_connect(self.endpoint) as ws:
+                self.stats.attempts += 1
+                async with await pool.async_connect(client_session, self.endpoint) as ws:
                     self._current_ws = ws
                     self.reconnect_times = 0
-                    async with anyio.create_task_group() as tg:
-                        try:
-                            tg.start_soon(self._handle_websocket_messages)
-                            tg.start_soon(self._handle_outgoing_messages)
-                            tg.start_soon(self._heartbeat_task)
-                            await self._mcp_server.run(self._recv_reader, self._send_writer, options)
-                        except Exception as err:
-                            _LOGGER.error("mcp Error in server tasks: %s", err)
-                            tg.cancel_scope.cancel()
-                            raise
+                    self._retry_delay = 0.0
+                    self.stats.record_connected(self._disconnected_at)
+                    self._disconnected_at = None
+                    pool.async_connected(self.endpoint)
+                    pool.async_add_websocket(ws)
+                    self._connected.set()
+                    try:
+                        async with anyio.create_task_group() as tg:
+                            try:
+                                tg.start_soon(self._handle_websocket_messages)
+                                tg.start_soon(self._handle_outgoing_messages)
+                                await self._mcp_server.run(self._recv_reader, self._send_writer, options)
+                            except Exception as err:
+                                _LOGGER.error("mcp Error in server tasks: %s", err)
+                                tg.cancel_scope.cancel()
+                                raise
+                    finally:
+                        self._connected.clear()
+                        pool.async_remove_websocket(ws)
             except aiohttp.WSServerHandshakeError as err:
                 _LOGGER.warning("mcp WebSocket handshake failed: %s", err)
+                if err.status == 429 and err.headers:
+                    try:
+                        self._retry_after = float(err.headers.get("Retry-After", 0))
+                    except ValueError:
+                        pass
                 if err.status == 401:
                     self.should_reconnect = False
                     _LOGGER.warning("mcp WebSocket unauthorized, disable reconnect")
@@ -172,6 +322,12 @@ class McpTransport:
             async for msg in self._current_ws:
                 if msg.type == aiohttp.WSMsgType.TEXT:
                     await self._process_text_message(msg)
+                elif msg.type == aiohttp.WSMsgType.PING:
+                    # autoping is off so the pongs of our heartbeat reach us
+                    await self._current_ws.pong(msg.data)
+                elif msg.type == aiohttp.WSMsgType.PONG:
+                    if (rtt := pong_rtt(msg.data)) is not None:
+                        self.metrics.record_rtt(rtt)
                 elif msg.type == aiohttp.WSMsgType.CLOSE:
                     _LOGGER.error("mcp WebSocket closed: %s", msg.extra)
                     break
@@ -193,8 +349,16 @@ class McpTransport:
                     message = session_message.message
                 else:
                     message = session_message
-                _LOGGER.info("mcp writer: %s", message)
-                await self._current_ws.send_str(message.model_dump_json(by_alias=True, exclude_none=True))
+                text = encode_message(message)
+                size = len(text.encode())
+                if size > self.max_tool_result_size:
+                    message, text, size = self._limit_result(message, text, size)
+                log_message(_LOGGER, "writer", message, text)
+                self.metrics.record_out(message, size)
+                depth = self._send_reader.statistics().current_buffer_used
+                start = time.monotonic()
+                await self._current_ws.send_str(text)
+                self.stats.send.record(depth, time.monotonic() - start)
         except Exception as err:
             _LOGGER.error("mcp Error writing to WebSocket: %s", err)
         finally:
@@ -204,34 +368,58 @@ class McpTransport:
             except Exception as err:
                 _LOGGER.error("mcp Error closing WebSocket: %s", err)
 
+    def _limit_result(self, message: types.JSONRPCMessage, text: str, size: int):
+        """Shrink an oversized tools/call result, other responses are left alone."""
+        root = message.root
+        if not isinstance(root, types.JSONRPCResponse):
+            return message, text, size
+        if (tool := self.metrics.pending_tool(root.id)) is None:
+            return message, text, size
+        result = limit_tool_result(tool, root.result, self.max_tool_result_size)
+        if result is root.result:
+            return message, text, size
+        limited = types.JSONRPCMessage(
+            types.JSONRPCResponse(jsonrpc=root.jsonrpc, id=root.id, result=result)
+        )
+        limited_text = encode_message(limited)
+        limited_size = len(limited_text.encode())
+        if limited_size >= size:
+            return message, text, size
+        message, text = limited, limited_text
+        self.metrics.record_oversized(size, limited_size)
+        _LOGGER.warning(
+            "mcp result of %s truncated from %s to %s bytes", tool, size, limited_size
+        )
+        return message, text, limited_size
+
     async def _process_text_message(self, msg: aiohttp.WSMessage):
         """Process a text message from WebSocket."""
         try:
-            json_data = msg.json()
-            message = types.JSONRPCMessage.model_validate(json_data)
-            _LOGGER.debug("mcp reader: %s", message)
+            message = decode_message(msg.data)
+            log_message(_LOGGER, "reader", message, msg.data)
+            self.metrics.record_in(message, len(msg.data.encode()))
             if SessionMessage:
                 message = SessionMessage(message)
-            await self._recv_writer.send(message)
+            await self.stats.recv.async_send(self._recv_writer, message)
         except Exception as err:
             _LOGGER.error("mcp Invalid message from client: %s", err)
 
-    async def _heartbeat_task(self):
-        """Send periodic heartbeat pings."""
-        try:
-            while self.should_reconnect and self._current_ws and not self._current_ws.closed:
-                await asyncio.sleep(55)
-                _LOGGER.debug("mcp heartbeat")
-                await self._current_ws.ping()
-        except Exception as err:
-            _LOGGER.error("mcp heartbeat ping failed: %s", err)
-
-    async def stop(self):
+    async def stop(self, timeout: float = STOP_TIMEOUT):
+        """Close the streams and the websocket together, waiting at most timeout."""
         self.should_reconnect = False
         self.reconnect_times = 0
 
-        for stream in (self._recv_writer, self._recv_reader, self._send_writer, self._send_reader):
-            if stream:
-                await stream.aclose()
+        closers = [
+            stream.aclose()
+            for stream in (self._recv_writer, self._recv_reader, self._send_writer, self._send_reader)
+            if stream
+        ]
         if self._current_ws:
-            await self._current_ws.close()
+            closers.append(self._current_ws.close())
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.gather(*closers, return_exceptions=True)
+        except TimeoutError:
+            _LOGGER.warning("mcp transport not closed after %ss, cancelling it", timeout)
+        if self._task and not self._task.done():
+            self._task.cancel()
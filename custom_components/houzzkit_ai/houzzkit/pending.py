@@ -0,0 +1,104 @@
+"""Setup data the QR code config flows are waiting for.
+
+Each flow takes a uuid that goes into its QR code, and the speaker posts
+its setup data to HouzzkitSetupView with that uuid. Slots expire after
+PENDING_TTL seconds and at most PENDING_MAX_SIZE are kept, so flows that are
+abandoned don't pile up.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import ulid
+
+from ..const import DOMAIN
+
+DATA_PENDING_SETUP = "pending_setup"
+PENDING_TTL = 1800
+PENDING_MAX_SIZE = 64
+
+
+@dataclass(slots=True)
+class PendingSetup:
+    expires: float
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+    data: dict[str, Any] | None = None
+
+
+class PendingSetupStore:
+    """Pending setup slots by uuid, oldest first."""
+
+    def __init__(self, ttl: float = PENDING_TTL, max_size: int = PENDING_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._slots: OrderedDict[str, PendingSetup] = OrderedDict()
+
+    @classmethod
+    @callback
+    def get(cls, hass: HomeAssistant) -> "PendingSetupStore":
+        """Get the store kept in hass.data, creating it on first use."""
+        this_data = hass.data.setdefault(DOMAIN, {})
+        if (store := this_data.get(DATA_PENDING_SETUP)) is None:
+            store = this_data[DATA_PENDING_SETUP] = cls()
+        return store
+
+    def __contains__(self, uuid: str) -> bool:
+        self._expire()
+        return uuid in self._slots
+
+    @callback
+    def async_create(self) -> str:
+        """Open a slot and return its uuid, dropping the oldest one when full."""
+        self._expire()
+        while len(self._slots) >= self.max_size:
+            self._release(self._slots.popitem(last=False)[1])
+        uuid = ulid.ulid_hex()
+        self._slots[uuid] = PendingSetup(time.monotonic() + self.ttl)
+        return uuid
+
+    @callback
+    def async_set(self, uuid: str, data: dict[str, Any]) -> bool:
+        """Store the setup data of a slot and wake its flow, False if unknown."""
+        self._expire()
+        if (slot := self._slots.get(uuid)) is None:
+            return False
+        slot.data = data
+        slot.event.set()
+        return True
+
+    @callback
+    def async_get(self, uuid: str) -> dict[str, Any] | None:
+        if (slot := self._slots.get(uuid)) is None:
+            return None
+        return slot.data
+
+    async def async_wait(self, uuid: str, timeout: float | None = None) -> dict[str, Any] | None:
+        """Wait for the setup data of a slot, None on timeout or once it's gone."""
+        if (slot := self._slots.get(uuid)) is None:
+            return None
+        try:
+            async with asyncio.timeout(timeout):
+                await slot.event.wait()
+        except TimeoutError:
+            return None
+        return slot.data
+
+    @callback
+    def async_pop(self, uuid: str) -> dict[str, Any] | None:
+        if (slot := self._slots.pop(uuid, None)) is None:
+            return None
+        self._release(slot)
+        return slot.data
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._slots and next(iter(self._slots.values())).expires <= now:
+            self._release(self._slots.popitem(last=False)[1])
+
+    @staticmethod
+    def _release(slot: PendingSetup):
+        # Waiters of a dropped slot get whatever data it had
+        slot.event.set()
@@ -0,0 +1,62 @@
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+# Seconds a salt can't be used again, and the most salts remembered
+NONCE_WINDOW = 300
+NONCE_MAX_SIZE = 4096
+
+
+@lru_cache(maxsize=32)
+def _md5_uri(uri: str) -> str:
+    return hashlib.md5(uri.encode('utf-8')).hexdigest()
+
+
+def calculate_sign(uri, params, mac, salt):
+    """
+    签名算法:
+    1. n = md5(uri)
+    2. 拼接参数字符串并计算 m = md5(参数字符串)
+    3. response = md5(m + n + mac + salt)
+    """
+    # 步骤1: 计算 n = md5(uri), 接口地址固定, 结果缓存
+    n = _md5_uri(uri)
+
+    # 步骤2: 拼接参数并计算 m = md5(参数字符串)
+    # 将参数排序后拼接为 key=value 格式
+    param_str = '&'.join([f"{k}={params[k]}" for k in sorted(params)])
+    m = hashlib.md5(param_str.encode('utf-8')).hexdigest()
+
+    # 步骤3: 计算最终摘要
+    response_str = f"{m}{n}{mac}{salt}"
+    return hashlib.md5(response_str.encode('utf-8')).hexdigest()
+
+
+def verify_sign(sign, uri, params, mac, salt) -> bool:
+    """Compare the signature in constant time."""
+    expected = calculate_sign(uri, params, mac, salt)
+    return hmac.compare_digest(expected.encode(), (sign or "").encode())
+
+
+class NonceCache:
+    """Salts seen in the last window seconds, at most max_size of them."""
+
+    def __init__(self, window: float = NONCE_WINDOW, max_size: int = NONCE_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._seen: OrderedDict[tuple, float] = OrderedDict()
+
+    def add(self, key: tuple) -> bool:
+        """Remember a salt, False if it was already used."""
+        now = time.monotonic()
+        # Oldest first, so expired salts are all at the front
+        while self._seen and next(iter(self._seen.values())) <= now:
+            self._seen.popitem(last=False)
+        if key in self._seen:
+            return False
+        self._seen[key] = now + self.window
+        if len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return True
@@ -1,20 +1,10 @@
-import time
-import yaml
 import logging
-import aiofiles
 import voluptuous as vol
 
-from pathlib import Path
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv, intent
 from homeassistant.const import (
     Platform, ATTR_ENTITY_ID,
-    CONF_ID, SERVICE_RELOAD,
-    CONF_ALIAS, CONF_MODE, CONF_TRIGGER, CONF_ACTION,
-)
-from homeassistant.components.automation import (
-    DOMAIN as AUTOMATION_DOMAIN,
-    CONF_TRIGGERS, CONF_ACTIONS,
 )
 from homeassistant.components.climate.const import (
     HVAC_MODES,
@@ -24,9 +14,16 @@ from homeassistant.components.climate.const import (
     ATTR_FAN_MODES,
     ATTR_FAN_MODE,
 )
+from homeassistant.util import dt as dt_util, ulid
 from homeassistant.util.percentage import percentage_to_ordered_list_item
 
-from .houzzkit import get_entities
+from .alarm_clock import (
+    WEEKDAYS,
+    AlarmClock,
+    AlarmClockManager,
+    countdown_due,
+    find_alarm_entity_id,
+)
 from .intent_adjust_attribute import AdjustDeviceAttributeIntent
 from .intent_live_context import HouzzkitGetLiveContextIntent
 
@@ -39,6 +36,8 @@ async def async_setup_intents(hass: HomeAssistant):
     intent.async_register(hass, ClimateSetFanModeIntent())
     intent.async_register(hass, CreateAlarmClockIntent())
     intent.async_register(hass, CreateCountdownAlarmClockIntent())
+    intent.async_register(hass, ListAlarmClockIntent())
+    intent.async_register(hass, DeleteAlarmClockIntent())
     intent.async_register(hass, AdjustDeviceAttributeIntent())
     intent.async_register(hass, HouzzkitGetLiveContextIntent())
 
@@ -204,6 +203,15 @@ repeat_SINGLE = "single"
 MOD_CYCLE = "cycle"
 REPEAT_EVERYDAY = "everyday"
 REPEAT_WORKDAY = "weekday"
+DAY_NAMES = {
+    "mon": "周一",
+    "tue": "周二",
+    "wed": "周三",
+    "thu": "周四",
+    "fri": "周五",
+    "sat": "周六",
+    "sun": "周日"
+}
 
 
 class CreateAlarmClockIntent(intent.IntentHandler):
@@ -215,28 +223,31 @@ class CreateAlarmClockIntent(intent.IntentHandler):
 
     # Optional. A validation schema for slots
     slot_schema = {
-        vol.Required("trigger_time"): cv.string,
+        vol.Required("trigger_time"): vol.All(cv.ensure_list, [cv.string]),
         vol.Required("alias"): cv.string,
-        vol.Required("repeat"): vol.All(cv.ensure_list, [vol.In([REPEAT_EVERYDAY, REPEAT_WORKDAY])]),
+        vol.Optional("repeat"): vol.All(cv.ensure_list, [vol.In([REPEAT_EVERYDAY, REPEAT_WORKDAY])]),
+        vol.Optional("weekdays"): vol.All(cv.ensure_list, [vol.In(WEEKDAYS)]),
         # vol.Required("speaker_id"): cv.string
     }
 
     async def async_handle(self, intent_obj):
         """Handle the intent. """
         slots = self.async_validate_slots(intent_obj.slots)
-        trigger_time = slots["trigger_time"]["value"]
+        trigger_times = slots["trigger_time"]["value"]
         alias = slots["alias"]["value"]
-        repeat = slots["repeat"]["value"]
         speak_id = slots["_speaker_id"]["value"]
-        week_day = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-        if repeat == REPEAT_WORKDAY:
-            week_day = ["mon", "tue", "wed", "thu", "fri"]
-        trigger = [{
-            CONF_TRIGGER: 'time',
-            'at': trigger_time,
-            'weekday': week_day
-        }]
-        success, message = await create_alarm_clock_auto(intent_obj.hass, trigger, alias, speak_id, True)
+        if "weekdays" in slots:
+            # 保持周一到周日的顺序
+            week_day = [d for d in WEEKDAYS if d in slots["weekdays"]["value"]]
+        else:
+            repeat = slots.get("repeat", {}).get("value", [REPEAT_EVERYDAY])
+            week_day = WEEKDAYS
+            if REPEAT_EVERYDAY not in repeat and REPEAT_WORKDAY in repeat:
+                week_day = WEEKDAYS[:5]
+        success, message = create_alarm_clock(
+            intent_obj.hass, speak_id, alias, "weekly",
+            *({"at": at, "weekdays": week_day} for at in trigger_times),
+        )
         if success is False:
             raise intent.IntentHandleError(
                 f"创建闹钟失败: {message}",
@@ -244,20 +255,11 @@ class CreateAlarmClockIntent(intent.IntentHandler):
             )
         response = intent_obj.create_response()
         # 格式化工作日显示
-        day_names = {
-            "mon": "周一",
-            "tue": "周二",
-            "wed": "周三",
-            "thu": "周四",
-            "fri": "周五",
-            "sat": "周六",
-            "sun": "周日"
-        }
-        formatted_days = ", ".join([day_names[d] for d in week_day])
+        formatted_days = ", ".join([DAY_NAMES[d] for d in week_day])
         response.async_set_speech(
             f"已成功创建闹钟 '{alias}'，"
             f"将在每周 {formatted_days} "
-            f"的 {trigger_time} 触发"
+            f"的 {', '.join(trigger_times)} 触发"
         )
         return response
 
@@ -295,17 +297,10 @@ class CreateCountdownAlarmClockIntent(intent.IntentHandler):
         minutes = slots["minute"]["value"]
         seconds = slots["second"]["value"]
         speak_id = slots["_speaker_id"]["value"]
-        trigger = {
-            CONF_TRIGGER: 'time_pattern'
-        }
-        if hours > 0:
-            trigger['hours'] = f"/{str(hours)}"
-        if minutes > 0:
-            trigger['minutes'] = f"/{str(minutes)}"
-        if seconds > 0:
-            trigger['seconds'] = f"/{str(seconds)}"
-        triggers = [trigger]
-        success, message = await create_alarm_clock_auto(intent_obj.hass, triggers, alias, speak_id, False)
+        success, message = create_alarm_clock(
+            intent_obj.hass, speak_id, alias, "countdown",
+            {"due": countdown_due(hours, minutes, seconds)},
+        )
         response = intent_obj.create_response()
         if success is False:
             raise intent.IntentHandleError(
@@ -319,81 +314,90 @@ class CreateCountdownAlarmClockIntent(intent.IntentHandler):
         )
         return response
 
-async def create_alarm_clock_auto(hass, triggers: list[dict], alias, speak_id, repeat: bool) -> tuple[bool, str]:
+class ListAlarmClockIntent(intent.IntentHandler):
+    """Handle 查询闹钟."""
+    intent_type = "HOUZZkitListAlarmClock"
+
+    description = "List the alarm clocks of this speaker"
+
+    slot_schema = {}
+
+    async def async_handle(self, intent_obj):
+        """Handle the intent. """
+        slots = self.async_validate_slots(intent_obj.slots)
+        speak_id = slots["_speaker_id"]["value"]
+        alarms = AlarmClockManager.get(intent_obj.hass).async_list(speak_id)
+        response = intent_obj.create_response()
+        response.response_type = intent.IntentResponseType.QUERY_ANSWER
+        if not alarms:
+            response.async_set_speech("当前没有闹钟")
+            return response
+        lines = []
+        for alarm in alarms:
+            if alarm.kind == "countdown":
+                due = dt_util.as_local(dt_util.parse_datetime(alarm.due))
+                lines.append(f"'{alarm.alias}' 将在 {due:%H:%M:%S} 触发")
+            else:
+                days = ", ".join(DAY_NAMES[d] for d in alarm.weekdays)
+                lines.append(f"'{alarm.alias}' 每周 {days} 的 {alarm.at} 触发")
+        response.async_set_speech("；".join(lines))
+        return response
+
+
+class DeleteAlarmClockIntent(intent.IntentHandler):
+    """Handle 删除闹钟."""
+    intent_type = "HOUZZkitDeleteAlarmClock"
+
+    description = "Delete an alarm clock of this speaker by its alias"
+
+    slot_schema = {
+        vol.Required("alias"): cv.string,
+    }
+
+    async def async_handle(self, intent_obj):
+        """Handle the intent. """
+        slots = self.async_validate_slots(intent_obj.slots)
+        alias = slots["alias"]["value"]
+        speak_id = slots["_speaker_id"]["value"]
+        manager = AlarmClockManager.get(intent_obj.hass)
+        deleted = [
+            alarm
+            for alarm in manager.async_list(speak_id)
+            if alarm.alias == alias and manager.async_delete(alarm.id)
+        ]
+        if not deleted:
+            raise intent.IntentHandleError(
+                f"未找到闹钟: {alias}",
+                response_key="not_found"
+            )
+        response = intent_obj.create_response()
+        response.async_set_speech(f"已删除闹钟 '{alias}'")
+        return response
+
+
+@callback
+def create_alarm_clock(hass, speak_id, alias, kind, *params: dict) -> tuple[bool, str]:
     """
+        每组参数创建一个闹钟，全部一次保存
         倒计时闹钟
-        trigger = [{
-            'trigger': 'time_pattern',
-            'seconds': '/20',
-        }]
-        res = await create_alarm_clock_auto(hass, trigger, "闹钟1", data.get("speak_id"), False)
+        create_alarm_clock(hass, speak_id, "闹钟1", "countdown", {"due": countdown_due(0, 5, 0)})
         循环闹钟
-        week_day = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-        trigger = [{
-            CONF_TRIGGER: 'time',
-            'at': trigger_time,
-            'weekday': week_day
-        }]
-        res = await create_alarm_clock_auto(hass, trigger, "闹钟1", data.get("speak_id"), True)
+        create_alarm_clock(hass, speak_id, "闹钟1", "weekly",
+                           {"at": "07:30", "weekdays": ["mon", "tue"]},
+                           {"at": "08:00", "weekdays": ["sat", "sun"]})
     """
-    config_key = str(int(time.time()))
-    entries = get_entities(hass, speak_id)
-    entry_id = ""
-    for entry in entries:
-        if entry.name == "Alarm":
-            entry_id = entry.entity_id
-    if len(entry_id) == 0:
+    if not params:
+        return False, "未指定闹钟时间"
+    if kind == "weekly":
+        for param in params:
+            if dt_util.parse_time(param["at"]) is None:
+                return False, f"时间格式错误: {param['at']}"
+            if not param["weekdays"]:
+                return False, "未指定重复日期"
+    if not find_alarm_entity_id(hass, speak_id):
         return False, "未找到对应的可操作设备"
-    action = [{
-        CONF_ACTION: 'button.press',
-        'metadata': {},
-        'data': {},
-        'target': {
-            'entity_id': entry_id
-        }
-    }]
-    if repeat is False:
-        action.append({
-            CONF_ACTION: 'automation.toggle',
-            'metadata': {},
-            'data': {},
-            'target': {
-                'entity_id': '{{ this.entity_id }}'
-            }
-        })
-    automations_config = {
-        CONF_ID: f"{config_key}",
-        CONF_ALIAS: alias,
-        'description': '',
-        CONF_TRIGGERS: triggers,
-        'conditions': [],
-        CONF_ACTIONS: action,
-        CONF_MODE: 'single'
-    }
-    automations_path = Path(hass.config.path("automations.yaml"))
-    try:
-        # 读取现有配置（如果存在）
-        if automations_path.exists():
-            async with aiofiles.open(automations_path, 'r') as f:
-                content = await f.read()
-                existing_config = yaml.safe_load(content) or []
-        else:
-            existing_config = []
-        #合并配置（避免重复）
-        # 检查是否已经存在相同ID的自动化
-        existing_ids = {automation.get(CONF_ID) for automation in existing_config}
-        if automations_config.get(CONF_ID) not in existing_ids:
-            existing_config.append(automations_config)
-
-        async with aiofiles.open(automations_path, 'w') as f:
-            await f.write(yaml.dump(existing_config, default_flow_style=False, sort_keys=False))
-        _LOGGER.info("自动化配置已更新到 automations.yaml")
-        # 5. 重新加载自动化组件
-        await hass.services.async_call(
-            AUTOMATION_DOMAIN, SERVICE_RELOAD, {CONF_ID: config_key}
-        )
-        _LOGGER.info("自动化组件已重新加载")
-    except Exception as e:
-        _LOGGER.error("更新自动化配置时出错: %s", str(e))
-        return False, str(e)
+    AlarmClockManager.get(hass).async_create_many([
+        AlarmClock(id=ulid.ulid_now(), alias=alias, speak_id=speak_id, kind=kind, **param)
+        for param in params
+    ])
     return True, ""
@@ -1,6 +1,8 @@
+import asyncio
 from dataclasses import asdict, dataclass, field
 from enum import Enum
 import re
+from collections.abc import Hashable
 from typing import Any, Callable, Literal, get_args
 import voluptuous as vol
 import logging
@@ -8,7 +10,7 @@ from homeassistant.components import cover, humidifier
 from homeassistant.components import fan
 from homeassistant.components import light
 from homeassistant.components import climate
-from homeassistant.exceptions import ServiceValidationError
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity_registry as er
 from homeassistant.core import State, callback
 from homeassistant.helpers import config_validation as cv, intent
@@ -21,6 +23,10 @@ from homeassistant.util.percentage import percentage_to_ordered_list_item
 
 _LOGGER = logging.getLogger(__name__)
 
+# Service calls running at once, and the time to wait for each of them.
+DEFAULT_MAX_PARALLEL_CALLS = 8
+DEFAULT_CALL_TIMEOUT = 10
+
 UnsupportAdjustmentError = intent.IntentHandleError("Adjustment is not supported. Try setting it directly to the specified value.")
 
 
@@ -225,6 +231,24 @@ class AdjustmentTarget:
     service: str = ""
     service_data: dict = field(default_factory=dict)
     attributes: dict | None = None
+
+    def group_key(self) -> Hashable:
+        """Targets with equal keys can share one multi-entity service call."""
+        try:
+            key = (self.service, frozenset(self.service_data.items()))
+            hash(key)
+        except TypeError:
+            # Unhashable service data is never grouped.
+            return id(self)
+        return key
+
+
+@dataclass
+class AdjustmentCall:
+    service: str
+    service_data: dict
+    entity_ids: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
     
 adjustment_functions: dict[str, dict[str, Callable[[AdjustmentContext, AdjustmentTarget], None]]] = {}
 
@@ -496,6 +520,14 @@ class AdjustDeviceAttributeIntent(intent.IntentHandler):
     } # type: ignore
     platforms = {Platform.LIGHT, Platform.FAN, Platform.COVER, Platform.CLIMATE, Platform.MEDIA_PLAYER}
 
+    def __init__(
+        self,
+        max_parallel_calls: int = DEFAULT_MAX_PARALLEL_CALLS,
+        call_timeout: float = DEFAULT_CALL_TIMEOUT,
+    ) -> None:
+        self.max_parallel_calls = max_parallel_calls
+        self.call_timeout = call_timeout
+
     async def async_handle(self, intent_obj: intent.Intent) -> intent.IntentResponse:
         """Handle the intent."""
         hass = intent_obj.hass
@@ -544,44 +576,114 @@ class AdjustDeviceAttributeIntent(intent.IntentHandler):
                 result=match_result, constraints=match_constraints
             )
         assert match_result.states
+        prepare_adjustment = adjustment_functions.get(domain, {}).get(attribute)
+        entity_registry = er.async_get(hass)
+        # Entities in match order, with their target or the preparation error.
+        prepared: list[tuple[State, er.RegistryEntry, AdjustmentTarget, str | None]] = []
+        calls: dict[Hashable, AdjustmentCall] = {}
         for state in match_result.states:
-            _LOGGER.info(f"AdjustDeviceAttribute state: {state.as_dict_json}")
-            entity_id = state.entity_id
-            entity_registry = er.async_get(hass)
-            entity = entity_registry.async_get(entity_id)
+            _LOGGER.debug("AdjustDeviceAttribute state: %s", state.as_dict_json)
+            entity = entity_registry.async_get(state.entity_id)
             if not entity:
                 continue
-            
+
             error: str | None = None
             target = AdjustmentTarget()
             try:
-                prepare_adjustment = adjustment_functions.get(domain, {}).get(attribute)
                 if not prepare_adjustment:
                     raise intent.IntentHandleError("unspported")
-                
                 # Find the paramters to adjust.
                 prepare_adjustment(AdjustmentContext(state=state, delta=delta), target)
-                target.service_data[ATTR_ENTITY_ID] = state.entity_id
-                
-                # Perform adjustment.
-                _LOGGER.info(f"AdjustDeviceAttribute call target: {asdict(target)}")
-                await hass.services.async_call(
-                    domain,
-                    target.service,
-                    service_data=target.service_data,
-                    blocking=True,
-                    context=intent_obj.context,
-                )
-            except (intent.IntentHandleError, ServiceValidationError) as e:
+            except intent.IntentHandleError as e:
                 error = str(e)
-                
-            response.set_state(entity, target.attributes, error)
+            else:
+                call = calls.setdefault(
+                    target.group_key(),
+                    AdjustmentCall(target.service, target.service_data),
+                )
+                call.entity_ids.append(state.entity_id)
+            prepared.append((state, entity, target, error))
+
+        # Perform adjustments, one service call per distinct payload.
+        semaphore = asyncio.Semaphore(self.max_parallel_calls)
+        timeout_error = f"timed out after {self.call_timeout}s"
+
+        async def async_service_call(service: str, service_data: dict) -> str | None:
+            """Make one service call and return its error, if any."""
+            _LOGGER.info(
+                "AdjustDeviceAttribute call %s.%s: %s", domain, service, service_data
+            )
+            async with semaphore:
+                try:
+                    async with asyncio.timeout(self.call_timeout):
+                        await hass.services.async_call(
+                            domain,
+                            service,
+                            service_data=service_data,
+                            blocking=True,
+                            context=intent_obj.context,
+                        )
+                except (HomeAssistantError, vol.Invalid) as e:
+                    return str(e)
+            return None
+
+        async def async_call(call: AdjustmentCall) -> None:
+            try:
+                error = await async_service_call(
+                    call.service, {**call.service_data, ATTR_ENTITY_ID: call.entity_ids}
+                )
+            except TimeoutError:
+                call.errors = dict.fromkeys(call.entity_ids, timeout_error)
+                return
+            if error is None:
+                return
+            if len(call.entity_ids) == 1:
+                call.errors[call.entity_ids[0]] = error
+                return
+            # One entity can fail the whole group, retry each one to tell which.
+            # The service data holds absolute values, so retrying is idempotent.
+            results = await asyncio.gather(
+                *(
+                    async_service_call(
+                        call.service, {**call.service_data, ATTR_ENTITY_ID: entity_id}
+                    )
+                    for entity_id in call.entity_ids
+                ),
+                return_exceptions=True,
+            )
+            for entity_id, result in zip(call.entity_ids, results):
+                if isinstance(result, TimeoutError):
+                    call.errors[entity_id] = timeout_error
+                elif isinstance(result, BaseException):
+                    call.errors[entity_id] = str(result) or type(result).__name__
+                elif result is not None:
+                    call.errors[entity_id] = result
+
+        results = await asyncio.gather(
+            *(async_call(call) for call in calls.values()), return_exceptions=True
+        )
+        for call, result in zip(calls.values(), results):
+            if isinstance(result, BaseException):
+                _LOGGER.error(
+                    "AdjustDeviceAttribute call %s.%s failed: %s",
+                    domain, call.service, result, exc_info=result,
+                )
+                for entity_id in call.entity_ids:
+                    call.errors.setdefault(entity_id, str(result) or type(result).__name__)
+
+        errors = {
+            entity_id: error
+            for call in calls.values()
+            for entity_id, error in call.errors.items()
+        }
+        for state, entity, target, error in prepared:
+            response.set_state(entity, target.attributes, error or errors.get(state.entity_id))
             success_results.append(intent.IntentResponseTarget(
                 type=intent.IntentResponseTargetType.ENTITY,
                 name=state.name,
                 id=state.entity_id,
             ))
-                    
+
 
         if len(success_results) > 0:
             response.response_type = intent.IntentResponseType.ACTION_DONE
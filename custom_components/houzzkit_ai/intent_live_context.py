@@ -1,15 +1,21 @@
+from collections import OrderedDict
+from dataclasses import dataclass
 from enum import Enum
+import itertools
 from typing import Any
 import voluptuous as vol
 import logging
-from operator import attrgetter
 from homeassistant.helpers import entity_registry as er, intent
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.helpers.llm import CALENDAR_DOMAIN, SCRIPT_DOMAIN
 from homeassistant.util.json import JsonObjectType
 from decimal import Decimal
 from homeassistant.util import dt as dt_util, yaml as yaml_util
 from homeassistant.components.homeassistant import async_should_expose
+from homeassistant.components.homeassistant.exposed_entities import (
+    async_listen_entity_updates,
+)
 
 from homeassistant.helpers import (
     area_registry as ar,
@@ -18,119 +24,369 @@ from homeassistant.helpers import (
     entity_registry as er,
 )
 
+from .const import DOMAIN
 from .houzzkit import get_config_entry, get_entities
 
 
 _LOGGER = logging.getLogger(__name__)
 
-def _get_exposed_entities(
-    hass: HomeAssistant,
-    assistant: str,
-    include_state: bool = True,
-) -> dict[str, dict[str, dict[str, Any]]]:
-    """Get exposed entities.
+DATA_LIVE_CONTEXT = "live_context"
 
-    Splits out calendars and scripts.
-    """
-    area_registry = ar.async_get(hass)
-    entity_registry = er.async_get(hass)
-    device_registry = dr.async_get(hass)
-        
-    interesting_attributes = {
-        "temperature",
-        "current_temperature",
-        "temperature_unit",
-        "brightness",
-        "humidity",
-        "unit_of_measurement",
-        "device_class",
-        "current_position",
-        "percentage",
-        "volume_level",
-        "media_title",
-        "media_artist",
-        "media_album_name",
-        
-        "color_temp_kelvin",
-        "min_color_temp_kelvin",
-        "max_color_temp_kelvin",
-        "percentage_step",
-        "min_temp",
-        "max_temp",
-        "target_temp_step",
-        "min_humidity",
-        "max_humidity",
-        
-    }
+INTERESTING_ATTRIBUTES = {
+    "temperature",
+    "current_temperature",
+    "temperature_unit",
+    "brightness",
+    "humidity",
+    "unit_of_measurement",
+    "device_class",
+    "current_position",
+    "percentage",
+    "volume_level",
+    "media_title",
+    "media_artist",
+    "media_album_name",
 
-    entities = {}
-    data: dict[str, dict[str, Any]] = {
-        SCRIPT_DOMAIN: {},
-        CALENDAR_DOMAIN: {},
-    }
+    "color_temp_kelvin",
+    "min_color_temp_kelvin",
+    "max_color_temp_kelvin",
+    "percentage_step",
+    "min_temp",
+    "max_temp",
+    "target_temp_step",
+    "min_humidity",
+    "max_humidity",
+
+}
+
+# Split out of the live context, same as the LLM API does.
+EXCLUDED_DOMAINS = {SCRIPT_DOMAIN, CALENDAR_DOMAIN}
 
-    for state in sorted(hass.states.async_all(), key=attrgetter("name")):
-        if not async_should_expose(hass, assistant, state.entity_id):
-            continue
+# Max YAML bytes returned by one tool call, the rest is paged with a cursor.
+LIVE_CONTEXT_MAX_BYTES = 24 * 1024
+# Paged listings whose cursors are kept, the oldest are forgotten first.
+LIVE_CONTEXT_MAX_PAGED = 32
 
-        entity_entry = entity_registry.async_get(state.entity_id)
-        names = [state.name]
-        area_names = []
 
-        if entity_entry is not None:
-            names.extend(entity_entry.aliases)
-            if entity_entry.area_id and (
-                area := area_registry.async_get_area(entity_entry.area_id)
+def _get_entity_info(
+    state: State,
+    area_registry: ar.AreaRegistry,
+    entity_registry: er.EntityRegistry,
+    device_registry: dr.DeviceRegistry,
+) -> tuple[dict[str, Any], ar.AreaEntry | None]:
+    """Get the live context info and the area of an exposed entity."""
+    entity_entry = entity_registry.async_get(state.entity_id)
+    names = [state.name]
+    area_names = []
+    area: ar.AreaEntry | None = None
+
+    if entity_entry is not None:
+        names.extend(entity_entry.aliases)
+        if entity_entry.area_id and (
+            area := area_registry.async_get_area(entity_entry.area_id)
+        ):
+            # Entity is in area
+            area_names.append(area.name)
+            area_names.extend(area.aliases)
+        elif entity_entry.device_id and (
+            device := device_registry.async_get(entity_entry.device_id)
+        ):
+            # Check device area
+            if device.area_id and (
+                area := area_registry.async_get_area(device.area_id)
             ):
-                # Entity is in area
                 area_names.append(area.name)
                 area_names.extend(area.aliases)
-            elif entity_entry.device_id and (
-                device := device_registry.async_get(entity_entry.device_id)
-            ):
-                # Check device area
-                if device.area_id and (
-                    area := area_registry.async_get_area(device.area_id)
-                ):
-                    area_names.append(area.name)
-                    area_names.extend(area.aliases)
-
-        info: dict[str, Any] = {
-            "names": ", ".join(names),
-            "domain": state.domain,
-        }
 
-        if include_state:
-            info["state"] = state.state
-
-            # Convert timestamp device_class states from UTC to local time
-            if state.attributes.get("device_class") == "timestamp" and state.state:
-                if (parsed_utc := dt_util.parse_datetime(state.state)) is not None:
-                    info["state"] = dt_util.as_local(parsed_utc).isoformat()
-
-        if area_names:
-            info["areas"] = ", ".join(area_names)
-
-        if include_state and (
-            attributes := {
-                attr_name: (
-                    str(attr_value)
-                    if isinstance(attr_value, (Enum, Decimal, int))
-                    else attr_value
-                )
-                for attr_name, attr_value in state.attributes.items()
-                if attr_name in interesting_attributes
-            }
+    info: dict[str, Any] = {
+        "names": ", ".join(names),
+        "domain": state.domain,
+        "state": state.state,
+    }
+
+    # Convert timestamp device_class states from UTC to local time
+    if state.attributes.get("device_class") == "timestamp" and state.state:
+        if (parsed_utc := dt_util.parse_datetime(state.state)) is not None:
+            info["state"] = dt_util.as_local(parsed_utc).isoformat()
+
+    if area_names:
+        info["areas"] = ", ".join(area_names)
+
+    if attributes := {
+        attr_name: (
+            str(attr_value)
+            if isinstance(attr_value, (Enum, Decimal, int))
+            else attr_value
+        )
+        for attr_name, attr_value in state.attributes.items()
+        if attr_name in INTERESTING_ATTRIBUTES
+    }:
+        info["attributes"] = attributes
+
+    return info, area
+
+
+@dataclass(slots=True)
+class _EntityContext:
+    """Live context of one exposed entity with its pre-rendered YAML."""
+
+    sort_key: tuple[str, str]
+    info: dict[str, Any]
+    fragment: str
+    size: int
+    area_id: str | None = None
+    floor_id: str | None = None
+
+
+class LiveContextSnapshot:
+    """Exposed entities of an assistant, patched from bus events.
+
+    The snapshot is built on first use and then only the entities touched by
+    state changes or registry updates are refreshed, so a tool call joins YAML
+    fragments which are already rendered.
+    """
+
+    def __init__(self, hass: HomeAssistant, assistant: str) -> None:
+        self.hass = hass
+        self.assistant = assistant
+        self._entities: dict[str, _EntityContext] = {}
+        self._order: list[str] | None = None
+        self._scoped_orders: dict[tuple[str | None, str | None], list[str]] = {}
+        # Scoped order of each paged listing, frozen at its first page
+        self._pages: OrderedDict[str, list[str]] = OrderedDict()
+        self._page_ids = itertools.count(1)
+        self._dirty: set[str] = set()
+        self._rebuild = True
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @classmethod
+    @callback
+    def async_get(cls, hass: HomeAssistant, assistant: str) -> "LiveContextSnapshot":
+        """Get the snapshot of an assistant, creating it on first use."""
+        snapshots: dict[str, LiveContextSnapshot] = hass.data.setdefault(
+            DOMAIN, {}
+        ).setdefault(DATA_LIVE_CONTEXT, {})
+        if (snapshot := snapshots.get(assistant)) is None:
+            snapshot = snapshots[assistant] = cls(hass, assistant)
+            snapshot.async_start()
+        return snapshot
+
+    @classmethod
+    @callback
+    def async_stop_all(cls, hass: HomeAssistant) -> None:
+        """Stop the snapshots of all assistants, they're created again on use."""
+        snapshots: dict[str, LiveContextSnapshot] = hass.data.get(DOMAIN, {}).pop(
+            DATA_LIVE_CONTEXT, {}
+        )
+        for snapshot in snapshots.values():
+            snapshot.async_stop()
+
+    @callback
+    def async_start(self) -> None:
+        """Subscribe to the events which change the live context."""
+        bus = self.hass.bus
+        self._unsubs = [
+            bus.async_listen(EVENT_STATE_CHANGED, self._async_state_changed),
+            bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_registry_updated
+            ),
+            bus.async_listen(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_registry_updated
+            ),
+            bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, self._async_invalidate),
+            async_listen_entity_updates(
+                self.hass, self.assistant, self._async_exposure_updated
+            ),
+        ]
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from events and drop the cached context."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._entities.clear()
+        self._order = None
+        self._scoped_orders.clear()
+        self._pages.clear()
+        self._rebuild = True
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        self._dirty.add(event.data["entity_id"])
+
+    @callback
+    def _async_entity_registry_updated(self, event: Event) -> None:
+        self._dirty.add(event.data["entity_id"])
+        if old_entity_id := event.data.get("old_entity_id"):
+            self._dirty.add(old_entity_id)
+
+    @callback
+    def _async_device_registry_updated(self, event: Event) -> None:
+        if event.data["action"] != "update":
+            # Entities of created or removed devices fire their own events.
+            return
+        entity_registry = er.async_get(self.hass)
+        self._dirty.update(
+            entity.entity_id
+            for entity in er.async_entries_for_device(
+                entity_registry, event.data["device_id"]
+            )
+        )
+
+    @callback
+    def _async_invalidate(self, event: Event | None = None) -> None:
+        self._rebuild = True
+
+    @callback
+    def _async_exposure_updated(self) -> None:
+        self._rebuild = True
+
+    @callback
+    def _async_refresh(self) -> None:
+        """Apply the pending changes to the snapshot."""
+        if not self._rebuild and not self._dirty:
+            return
+        registries = (
+            ar.async_get(self.hass),
+            er.async_get(self.hass),
+            dr.async_get(self.hass),
+        )
+        if self._rebuild:
+            self._rebuild = False
+            self._dirty.clear()
+            self._entities.clear()
+            self._order = None
+            self._scoped_orders.clear()
+            for state in self.hass.states.async_all():
+                self._async_update_entity(state.entity_id, state, registries)
+            return
+
+        dirty, self._dirty = self._dirty, set()
+        for entity_id in dirty:
+            self._async_update_entity(
+                entity_id, self.hass.states.get(entity_id), registries
+            )
+
+    @callback
+    def _async_update_entity(
+        self,
+        entity_id: str,
+        state: State | None,
+        registries: tuple[ar.AreaRegistry, er.EntityRegistry, dr.DeviceRegistry],
+    ) -> None:
+        """Refresh one entity, only re-dumping it when its info changed."""
+        current = self._entities.get(entity_id)
+        if (
+            state is None
+            or state.domain in EXCLUDED_DOMAINS
+            or not async_should_expose(self.hass, self.assistant, entity_id)
+        ):
+            if current is not None:
+                del self._entities[entity_id]
+                self._order = None
+            return
+
+        info, area = _get_entity_info(state, *registries)
+        if current is not None and current.info == info:
+            return
+        fragment = yaml_util.dump([info])
+        entity = self._entities[entity_id] = _EntityContext(
+            sort_key=(state.name, entity_id),
+            info=info,
+            fragment=fragment,
+            size=len(fragment.encode()),
+            area_id=area.id if area else None,
+            floor_id=area.floor_id if area else None,
+        )
+        if current is None or (current.sort_key, current.area_id, current.floor_id) != (
+            entity.sort_key,
+            entity.area_id,
+            entity.floor_id,
         ):
-            info["attributes"] = attributes
+            self._order = None
+
+    @callback
+    def _async_get_order(self) -> list[str]:
+        """Return the exposed entity IDs sorted by name."""
+        if self._order is None:
+            entities = self._entities
+            self._order = sorted(entities, key=lambda eid: entities[eid].sort_key)
+            self._scoped_orders.clear()
+        return self._order
+
+    @callback
+    def _async_get_scoped_order(
+        self, area_id: str | None, floor_id: str | None
+    ) -> list[str]:
+        """Return the entity IDs of the area first, then its floor, then the rest."""
+        order = self._async_get_order()
+        if (scoped := self._scoped_orders.get((area_id, floor_id))) is None:
+            entities = self._entities
+
+            def _rank(entity_id: str) -> int:
+                entity = entities[entity_id]
+                if area_id and entity.area_id == area_id:
+                    return 0
+                if floor_id and entity.floor_id == floor_id:
+                    return 1
+                return 2
 
-        if state.domain in data:
-            data[state.domain][state.entity_id] = info
+            # Stable sort, so every group stays sorted by name.
+            scoped = self._scoped_orders[(area_id, floor_id)] = sorted(
+                order, key=_rank
+            )
+        return scoped
+
+    @callback
+    def async_render_scoped(
+        self,
+        area_id: str | None,
+        floor_id: str | None,
+        cursor: str | None = None,
+        max_bytes: int = LIVE_CONTEXT_MAX_BYTES,
+    ) -> tuple[str | None, str | None]:
+        """Return one page of YAML, starting with the given area and floor.
+
+        Entities in the area come first, then the rest of the floor, then the
+        rest of the home. Returns the page and the cursor of the next page, or
+        None when this was the last one. The order is frozen at the first page,
+        so entities added, removed or moved meanwhile don't shift the pages;
+        removed entities are skipped and new ones show up in the next listing.
+        The last page is empty when all its entities were removed meanwhile,
+        an unknown or expired cursor returns None instead of a page.
+        """
+        self._async_refresh()
+        if cursor:
+            page_id, _, start = cursor.partition(":")
+            if (order := self._pages.get(page_id)) is None or not start.isdigit():
+                return None, None
+            index = int(start)
         else:
-            entities[state.entity_id] = info
+            page_id = None
+            order = self._async_get_scoped_order(area_id, floor_id)
+            index = 0
+
+        fragments: list[str] = []
+        size = 0
+        while index < len(order):
+            if (entity := self._entities.get(order[index])) is None:
+                index += 1
+                continue
+            if fragments and size + entity.size > max_bytes:
+                break
+            fragments.append(entity.fragment)
+            size += entity.size
+            index += 1
+
+        if index >= len(order):
+            return "".join(fragments), None
+        if page_id is None:
+            page_id = f"{next(self._page_ids):x}"
+            self._pages[page_id] = order
+            while len(self._pages) > LIVE_CONTEXT_MAX_PAGED:
+                self._pages.popitem(last=False)
+        return "".join(fragments), f"{page_id}:{index}"
 
-    data["entities"] = entities
-    return data
 
 def find_speaker_area(hass: HomeAssistant, speaker_id: str) -> ar.AreaEntry | None:
     speaker_entities = get_entities(hass, speaker_id)
@@ -158,9 +414,12 @@ class HouzzkitGetLiveContextIntent(intent.IntentHandler):
         "Provides real-time information about the CURRENT state, value, or mode of devices, sensors, entities, or areas. "
         "Use this tool for: "
         "1. Answering questions about current conditions (e.g., 'Is the light on?'). "
-        "2. As the first step in conditional actions (e.g., 'If there is someone in the bedroom, turn on the bedroom light'), checking if there's anyone present is required."
+        "2. As the first step in conditional actions (e.g., 'If there is someone in the bedroom, turn on the bedroom light'), checking if there's anyone present is required. "
+        "Devices in the speaker's area are listed first, then its floor, then the rest of the home. "
+        "If the result contains `next_cursor` and the device you need is not listed, call this tool again with that cursor."
     )
     slot_schema = {
+        vol.Optional("cursor"): cv.string,
     } # type: ignore
 
     async def async_handle(self, intent_obj: intent.Intent) -> JsonObjectType:
@@ -169,6 +428,7 @@ class HouzzkitGetLiveContextIntent(intent.IntentHandler):
         _LOGGER.info(f"HouzzkitGetLiveContext: slots={slots}")
         
         speaker_id: str = slots.get("_speaker_id", {}).get("value")
+        cursor: str | None = slots.get("cursor", {}).get("value")
         
         hass = intent_obj.hass
         intent_obj.assistant
@@ -178,6 +438,7 @@ class HouzzkitGetLiveContextIntent(intent.IntentHandler):
             return {"success": False, "error": "No assistant configured"}
         
         speaker_info: dict | None = None
+        speaker_area: ar.AreaEntry | None = None
         if speaker_id:
             # Query the speaker's area by its ID.
             speaker_area = find_speaker_area(hass, speaker_id)
@@ -189,16 +450,29 @@ class HouzzkitGetLiveContextIntent(intent.IntentHandler):
                 }
                 _LOGGER.info(f"HouzzkitGetLiveContext: speaker_info={speaker_info}")
 
-        exposed_entities = _get_exposed_entities(hass, intent_obj.assistant)
-        if not exposed_entities["entities"]:
+        snapshot = LiveContextSnapshot.async_get(hass, intent_obj.assistant)
+        live_context, next_cursor = snapshot.async_render_scoped(
+            speaker_area.id if speaker_area else None,
+            speaker_area.floor_id if speaker_area else None,
+            cursor,
+        )
+        if live_context is None:
+            return {"success": False, "error": f"Invalid cursor: {cursor}"}
+        if not live_context and not cursor:
             return {"success": False, "error": "No devices available for operation. Please expose them in the Home Assistant voice assistant."}
-        
+        if not live_context:
+            # The rest of the listing was removed since the previous page
+            return {"success": True, "speaker": speaker_info, "result": "No more devices."}
+
         prompt = [
             "Live Context: An overview of the areas and the devices in this smart home:",
-            yaml_util.dump(list(exposed_entities["entities"].values())),
+            live_context,
         ]
-        return {
+        result: dict[str, Any] = {
             "success": True,
             "speaker": speaker_info,
             "result": "\n".join(prompt),
         }
+        if next_cursor is not None:
+            result["next_cursor"] = next_cursor
+        return result
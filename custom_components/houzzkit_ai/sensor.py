@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 import math
 
 from aioesphomeapi import (
@@ -18,18 +20,26 @@ from aioesphomeapi.model import LastResetType
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.typing import StateType
 from homeassistant.util import dt as dt_util
 from homeassistant.util.enum import try_parse_enum
 
 from .entity import EsphomeEntity, platform_async_setup_entry
 from .entry_data import ESPHomeConfigEntry
 from .enum_mapper import EsphomeEnumMapper
+from .houzzkit.mcp_transport import McpTransport, get_transport
 
 PARALLEL_UPDATES = 0
+# Only the MCP sensors poll, the ESPHome ones are pushed
+SCAN_INTERVAL = timedelta(seconds=30)
 
 
 async def async_setup_entry(
@@ -55,6 +65,12 @@ async def async_setup_entry(
         state_type=TextSensorState,
     )
 
+    entry_data = entry.runtime_data
+    if entry.data.get("mcp_endpoint") and entry_data.device_info is not None:
+        async_add_entities(
+            HouzzkitMcpSensor(hass, entry, description) for description in MCP_SENSORS
+        )
+
 
 _STATE_CLASSES: EsphomeEnumMapper[EsphomeSensorStateClass, SensorStateClass | None] = (
     EsphomeEnumMapper(
@@ -137,3 +153,129 @@ class EsphomeTextSensor(EsphomeEntity[TextSensorInfo, TextSensorState], SensorEn
         ):
             return value.date()
         return state_str
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+@dataclass(frozen=True, kw_only=True)
+class McpSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of the MCP transport."""
+
+    value_fn: Callable[[McpTransport], StateType]
+
+
+_LATENCY = {
+    "device_class": SensorDeviceClass.DURATION,
+    "native_unit_of_measurement": UnitOfTime.MILLISECONDS,
+    "state_class": SensorStateClass.MEASUREMENT,
+}
+_DATA_SIZE = {
+    "device_class": SensorDeviceClass.DATA_SIZE,
+    "native_unit_of_measurement": UnitOfInformation.BYTES,
+    "state_class": SensorStateClass.TOTAL_INCREASING,
+    "entity_registry_enabled_default": False,
+}
+
+MCP_SENSORS: tuple[McpSensorEntityDescription, ...] = (
+    McpSensorEntityDescription(
+        key="mcp_requests",
+        name="MCP requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda transport: sum(transport.metrics.requests.values()),
+    ),
+    McpSensorEntityDescription(
+        key="mcp_latency_p50",
+        name="MCP latency p50",
+        value_fn=lambda transport: _milliseconds(transport.metrics.latency.percentile(50)),
+        **_LATENCY,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_latency_p95",
+        name="MCP latency p95",
+        value_fn=lambda transport: _milliseconds(transport.metrics.latency.percentile(95)),
+        **_LATENCY,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_latency_p99",
+        name="MCP latency p99",
+        value_fn=lambda transport: _milliseconds(transport.metrics.latency.percentile(99)),
+        **_LATENCY,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_heartbeat_rtt",
+        name="MCP heartbeat round trip",
+        value_fn=lambda transport: _milliseconds(transport.metrics.heartbeat_rtt),
+        **_LATENCY,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_bytes_in",
+        name="MCP bytes received",
+        value_fn=lambda transport: transport.metrics.bytes_in,
+        **_DATA_SIZE,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_bytes_out",
+        name="MCP bytes sent",
+        value_fn=lambda transport: transport.metrics.bytes_out,
+        **_DATA_SIZE,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_oversized_results",
+        name="MCP oversized results",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda transport: transport.metrics.oversized_results,
+    ),
+    McpSensorEntityDescription(
+        key="mcp_queue_depth",
+        name="MCP queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda transport: sum(transport.queue_depth().values()),
+    ),
+    McpSensorEntityDescription(
+        key="mcp_connection_attempts",
+        name="MCP connection attempts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda transport: transport.stats.attempts,
+    ),
+)
+
+
+class HouzzkitMcpSensor(SensorEntity):
+    """A diagnostic sensor of the MCP transport of a speaker."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    entity_description: McpSensorEntityDescription
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ESPHomeConfigEntry,
+        description: McpSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.hass = hass
+        self.entity_description = description
+        self._entry_id = entry.entry_id
+        device_info = entry.runtime_data.device_info
+        assert device_info is not None
+        self._attr_unique_id = f"{device_info.mac_address}-{description.key}"
+        self._attr_device_info = DeviceInfo(
+            connections={(dr.CONNECTION_NETWORK_MAC, device_info.mac_address)}
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return if the transport of the speaker is running."""
+        return get_transport(self.hass, self._entry_id) is not None
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the entity."""
+        if (transport := get_transport(self.hass, self._entry_id)) is None:
+            return None
+        return self.entity_description.value_fn(transport)
@@ -0,0 +1,145 @@
+"""Micro-benchmark of the MCP websocket message codec.
+
+Compares the codec in houzzkit/mcp_codec.py with the previous json + model
+path and an orjson path, over tool call and live context payloads.
+
+    python scripts/bench_mcp_codec.py [--number N]
+
+Needs the mcp package (and orjson for the orjson rows), as installed with
+Home Assistant.
+"""
+import argparse
+import importlib.util
+import json
+import logging
+from pathlib import Path
+import timeit
+
+from mcp import types
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CODEC_PATH = (
+    Path(__file__).parent.parent
+    / "custom_components" / "houzzkit_ai" / "houzzkit" / "mcp_codec.py"
+)
+
+
+def load_codec():
+    spec = importlib.util.spec_from_file_location("mcp_codec", CODEC_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def live_context(entities: int) -> str:
+    """A live context like the one of GetLiveContext, entities long."""
+    lines = ["Live Context: An overview of the areas and the devices in this smart home:"]
+    for i in range(entities):
+        lines += [
+            f"- names: Light {i}",
+            "  domain: light",
+            "  state: 'on'",
+            f"  areas: Room {i % 12}",
+            "  attributes:",
+            f"    brightness: '{i % 255}'",
+            "    color_mode: color_temp",
+        ]
+    return "\n".join(lines)
+
+
+def payloads() -> dict[str, str]:
+    tool_call = {
+        "jsonrpc": "2.0",
+        "id": 42,
+        "method": "tools/call",
+        "params": {
+            "name": "HassLightSet",
+            "arguments": {"name": "Ceiling light", "area": "Living room", "brightness": 60},
+        },
+    }
+    tool_result = {
+        "jsonrpc": "2.0",
+        "id": 42,
+        "result": {
+            "content": [{"type": "text", "text": json.dumps({"success": True, "result": {
+                "speech": {}, "response_type": "action_done", "data": {
+                    "targets": [], "success": [
+                        {"name": "Ceiling light", "type": "entity", "id": "light.ceiling"}
+                    ], "failed": []},
+            }})}],
+            "isError": False,
+        },
+    }
+
+    def context_result(entities: int):
+        return {
+            "jsonrpc": "2.0",
+            "id": 43,
+            "result": {
+                "content": [{"type": "text", "text": json.dumps({
+                    "success": True, "result": live_context(entities),
+                })}],
+                "isError": False,
+            },
+        }
+
+    return {
+        "tool call": json.dumps(tool_call),
+        "tool result": json.dumps(tool_result),
+        "live context 100": json.dumps(context_result(100)),
+        "live context 2000": json.dumps(context_result(2000)),
+    }
+
+
+class FormatHandler(logging.Handler):
+    """Format records like a real handler, then drop them."""
+
+    def emit(self, record):
+        self.format(record)
+
+
+def bench(label: str, func, number: int):
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {label:<36} {seconds * 1e6:10.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    codec = load_codec()
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(FormatHandler())
+    logger.propagate = False
+
+    for name, text in payloads().items():
+        number = max(args.number * 200 // len(text), 5) if len(text) > 200 else args.number * 10
+        message = types.JSONRPCMessage.model_validate_json(text)
+        print(f"{name} ({len(text)} bytes, {number} loops)")
+
+        bench("decode json.loads + model_validate",
+              lambda: types.JSONRPCMessage.model_validate(json.loads(text)), number)
+        if orjson:
+            bench("decode orjson.loads + model_validate",
+                  lambda: types.JSONRPCMessage.model_validate(orjson.loads(text)), number)
+        bench("decode codec", lambda: codec.decode_message(text), number)
+
+        bench("encode codec", lambda: codec.encode_message(message), number)
+        if orjson:
+            bench("encode orjson.dumps(model_dump)", lambda: orjson.dumps(
+                message.model_dump(mode="json", by_alias=True, exclude_none=True)
+            ).decode(), number)
+
+        bench("log INFO repr (previous)", lambda: logger.info("mcp writer: %s", message), number)
+        bench("log codec (debug off)",
+              lambda: codec.log_message(logger, "writer", message, text), number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Load test of the speaker MCP transports against the local stand-in.
+
+Starts scripts/mcp_standin.py and, in this process, a bare Home Assistant
+core with N McpTransport instances connected to it, one per speaker. Once
+every session is initialized it sends tool calls at a fixed total rate,
+spread round robin over the connections, and prints throughput, tail
+latency, the transport counters and the memory added per connection. No
+running Home Assistant or config entries are needed, so transport
+regressions show up offline:
+
+    python scripts/mcp_loadtest.py --speakers 40 --rate 20 --duration 60
+
+With --external the transports of a running Home Assistant are measured
+instead: point the mcp_endpoint of N test entries at
+ws://HOST:PORT/mcp/<any-name> and pass its process id with --ha-pid. The
+stand-in only listens on 127.0.0.1 unless --host says otherwise, e.g.
+--host 0.0.0.0 when the speakers connect over the network.
+
+Latency and disconnects are injected with the same options as the stand-in.
+
+The in-process mode needs Home Assistant (the version in hacs.json or later),
+mcp and aiohttp_sse (a requirement of the mcp_server component) installed in
+the Python running the script, at the versions Home Assistant pins:
+
+    pip install homeassistant mcp aiohttp_sse
+
+Only the transport modules of the integration are imported, not its
+__init__, so aioesphomeapi and bluetooth aren't needed. --external only
+needs aiohttp.
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+from types import ModuleType, SimpleNamespace
+
+from aiohttp import web
+
+from mcp_standin import DEFAULT_SCENARIO, McpStandin, load_scenario
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "custom_components.houzzkit_ai"
+IN_PROCESS_REQUIREMENTS = "homeassistant mcp aiohttp_sse"
+
+
+def import_transport():
+    """Import McpTransport without running the integration __init__."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    if PACKAGE not in sys.modules:
+        package = ModuleType(PACKAGE)
+        package.__path__ = [str(ROOT / "custom_components" / "houzzkit_ai")]
+        sys.modules[PACKAGE] = package
+    from custom_components.houzzkit_ai.houzzkit.mcp_transport import McpTransport
+    return McpTransport
+
+
+def rss_bytes(pid: int) -> int | None:
+    """Return the resident memory of a process, on Linux."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+async def async_wait_ready(standin: McpStandin, count: int, timeout: float) -> bool:
+    """Wait until count speakers have initialized their MCP session."""
+    try:
+        async with asyncio.timeout(timeout):
+            async with standin.ready:
+                await standin.ready.wait_for(lambda: standin.initialized >= count)
+    except TimeoutError:
+        return False
+    return True
+
+
+async def async_start_hass(config_dir: str):
+    """Start a bare Home Assistant core with the components the MCP server needs."""
+    from homeassistant import bootstrap, loader
+    from homeassistant.config_entries import ConfigEntries
+    from homeassistant.core import HomeAssistant
+    from homeassistant.setup import async_setup_component
+
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    # The tools of the default scenario come from the LLM API, intent
+    # and its http dependency aren't needed
+    if not await async_setup_component(hass, "homeassistant", {}):
+        raise RuntimeError("Failed to set up homeassistant")
+    await hass.async_start()
+    return hass
+
+
+def start_transports(hass, transport_cls, count: int, url: str) -> list:
+    """Start count transports, each as the speaker of a stand-in config entry."""
+    from homeassistant.const import CONF_LLM_HASS_API
+    from homeassistant.helpers import llm
+
+    transports = []
+    for i in range(count):
+        endpoint = f"{url}/mcp/speaker-{i}"
+        entry = SimpleNamespace(
+            entry_id=f"loadtest-{i}",
+            data={"mcp_endpoint": endpoint, CONF_LLM_HASS_API: llm.LLM_API_ASSIST},
+            options={},
+        )
+        transport = transport_cls(hass, entry)
+        transport.start()
+        transports.append(transport)
+    return transports
+
+
+def transports_report(transports: list) -> dict:
+    """Return the counters of the transports, summed."""
+    report = {
+        "attempts": 0,
+        "successes": 0,
+        "reconnect_max": None,
+        "errors": 0,
+        "oversized_results": 0,
+        "recv_wait_max": 0.0,
+        "send_wait_max": 0.0,
+    }
+    for transport in transports:
+        stats, metrics = transport.stats, transport.metrics
+        report["attempts"] += stats.attempts
+        report["successes"] += stats.successes
+        if stats.reconnect_max is not None:
+            report["reconnect_max"] = max(report["reconnect_max"] or 0.0, stats.reconnect_max)
+        report["errors"] += metrics.errors
+        report["oversized_results"] += metrics.oversized_results
+        report["recv_wait_max"] = max(report["recv_wait_max"], stats.recv.wait_max)
+        report["send_wait_max"] = max(report["send_wait_max"], stats.send.wait_max)
+    return report
+
+
+async def async_run_load(standin: McpStandin, requests: list[dict], rate: float, duration: float) -> float:
+    """Send requests round robin over the initialized speakers, return the seconds taken."""
+    tasks: set[asyncio.Task] = set()
+    messages = itertools.cycle(requests)
+    interval = 1 / rate
+    start = time.monotonic()
+    next_send = start
+    while time.monotonic() - start < duration:
+        connections = [c for c in standin.connections.values() if c.initialized]
+        if not connections:
+            await asyncio.sleep(interval)
+            continue
+        for connection in connections:
+            if time.monotonic() - start >= duration:
+                break
+            task = asyncio.create_task(connection.async_send_message(next(messages)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_send += interval
+            await asyncio.sleep(max(next_send - time.monotonic(), 0))
+    if tasks:
+        await asyncio.wait(tasks, timeout=30)
+    return time.monotonic() - start
+
+
+async def async_main(args):
+    transport_cls = None
+    if not args.external:
+        try:
+            transport_cls = import_transport()
+        except ImportError as err:
+            sys.exit(f"{err}; install {IN_PROCESS_REQUIREMENTS} or use --external")
+    scenario = load_scenario(args.replay) if args.replay else DEFAULT_SCENARIO
+    requests = [step["message"] for step in scenario if not step["message"]["method"].startswith("notifications/")]
+    # Connections only initialize; the load is driven from here
+    with (
+        tempfile.TemporaryDirectory() as config_dir,
+        McpStandin(latency=args.latency, disconnect_rate=args.disconnect_rate) as standin,
+    ):
+        runner = web.AppRunner(standin.app())
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port).start()
+        hass = None
+        transports = []
+        try:
+            pid = args.ha_pid
+            if not args.external:
+                hass = await async_start_hass(config_dir)
+                pid = os.getpid()
+            gc.collect()
+            rss_before = rss_bytes(pid) if pid else None
+
+            if hass is not None:
+                transports = start_transports(
+                    hass, transport_cls, args.speakers, f"ws://127.0.0.1:{args.port}"
+                )
+            else:
+                print(f"waiting for {args.speakers} speakers on ws://{args.host}:{args.port}/mcp/<name>")
+            if not await async_wait_ready(standin, args.speakers, args.connect_timeout):
+                print(f"only {standin.initialized} speakers initialized")
+            # Measured once every session is up, not while speakers still connect
+            ready = standin.initialized
+            gc.collect()
+            rss_after = rss_bytes(pid) if pid else None
+
+            standin.stats.latencies.clear()
+            standin.stats.requests = standin.stats.responses = 0
+            seconds = await async_run_load(standin, requests, args.rate, args.duration)
+
+            report = standin.stats.report(seconds)
+            report["speakers"] = ready
+            if rss_before is not None and rss_after is not None and ready:
+                report["rss_bytes"] = rss_after
+                report["rss_per_connection_bytes"] = (rss_after - rss_before) // ready
+            if transports:
+                report["transports"] = transports_report(transports)
+            print(json.dumps(report, indent=2))
+        finally:
+            await asyncio.gather(*(transport.stop() for transport in transports))
+            if hass is not None:
+                await hass.async_stop()
+            await runner.cleanup()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on, 0.0.0.0 for real speakers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speakers", type=int, default=1, help="transports to run, or connections to wait for")
+    parser.add_argument("--connect-timeout", type=float, default=120.0)
+    parser.add_argument("--rate", type=float, default=5.0, help="requests per second over all speakers")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--replay", help="scenario JSONL file whose requests are sent")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds added before each message")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="random drops per connection per second")
+    parser.add_argument("--external", action="store_true", help="measure the transports of a running Home Assistant")
+    parser.add_argument("--ha-pid", type=int, help="with --external, the Home Assistant process to measure memory of")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main(build_parser().parse_args()))
@@ -0,0 +1,340 @@
+"""Local stand-in for the cloud MCP endpoint.
+
+Speakers connect to ws://HOST:PORT/mcp/<name> as they would to the cloud, and
+the stand-in plays the MCP client: it initializes the session, then sends the
+requests of a scenario and times the responses. Latency and disconnects can
+be injected, and sessions recorded to and replayed from JSONL files.
+
+Point the mcp_endpoint of one or more test entries at the stand-in, then
+run it; it listens on 127.0.0.1 unless --host 0.0.0.0 lets speakers on the
+network reach it, without any authentication:
+
+    python scripts/mcp_standin.py --host 0.0.0.0 --port 8765 --record session.jsonl
+    python scripts/mcp_standin.py --replay session.jsonl --latency 0.2
+
+A scenario file has one JSON object per line: {"delay": seconds, "message":
+{...}, "speaker": name} where message is a JSON-RPC request or notification
+sent to the speaker. Steps tagged with a speaker are replayed on the
+connection of that name, and connections without steps of their own replay
+those of the first recorded speaker; untagged steps go to every connection.
+Delays are per speaker. Request ids are assigned when sending, so a
+recording can be replayed any number of times. scripts/mcp_loadtest.py
+drives many connections with this stand-in.
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import itertools
+import json
+import logging
+import random
+import time
+
+from aiohttp import WSMsgType, web
+
+_LOGGER = logging.getLogger("mcp_standin")
+
+PROTOCOL_VERSION = "2024-11-05"
+
+DEFAULT_SCENARIO = [
+    {"delay": 0, "message": {"method": "tools/list", "params": {}}},
+    {"delay": 0.5, "message": {
+        "method": "tools/call",
+        "params": {"name": "GetLiveContext", "arguments": {}},
+    }},
+    {"delay": 0.5, "message": {
+        "method": "tools/call",
+        "params": {"name": "GetDateTime", "arguments": {}},
+    }},
+]
+
+
+def load_scenario(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def speaker_scenario(scenario: list[dict], name: str) -> list[dict]:
+    """Return the steps of a scenario replayed on the connection of a speaker."""
+    speakers = [step["speaker"] for step in scenario if step.get("speaker")]
+    if speakers and name not in speakers:
+        name = speakers[0]
+    return [step for step in scenario if step.get("speaker", name) == name]
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+
+@dataclass
+class StandinStats:
+    connections: int = 0
+    disconnects: int = 0
+    requests: int = 0
+    responses: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    def report(self, seconds: float) -> dict:
+        return {
+            "seconds": round(seconds, 1),
+            "connections": self.connections,
+            "disconnects": self.disconnects,
+            "requests": self.requests,
+            "responses": self.responses,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "throughput_rps": round(self.responses / seconds, 1) if seconds else None,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            **{
+                f"latency_p{q}_ms": (
+                    round(value * 1000, 1)
+                    if (value := percentile(self.latencies, q)) is not None else None
+                )
+                for q in (50, 95, 99)
+            },
+        }
+
+
+class SpeakerConnection:
+    """The MCP client side of one speaker websocket."""
+
+    def __init__(self, standin: "McpStandin", name: str, ws: web.WebSocketResponse):
+        self.standin = standin
+        self.name = name
+        self.ws = ws
+        self._ids = itertools.count(1)
+        self._pending: dict[int, tuple[float, asyncio.Future]] = {}
+        self.initialized = False
+
+    async def async_request(self, method: str, params: dict | None = None, timeout: float = 30) -> dict | None:
+        """Send a request and wait for its response, recording the latency."""
+        msg_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = (time.monotonic(), future)
+        await self._async_send({"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params or {}})
+        self.standin.stats.requests += 1
+        try:
+            async with asyncio.timeout(timeout):
+                return await future
+        except TimeoutError:
+            self.standin.stats.timeouts += 1
+            return None
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def async_notify(self, method: str, params: dict | None = None):
+        await self._async_send({"jsonrpc": "2.0", "method": method, "params": params or {}})
+
+    async def async_send_message(self, message: dict):
+        """Send a scenario message, notifications/* without waiting for an answer."""
+        if message["method"].startswith("notifications/"):
+            await self.async_notify(message["method"], message.get("params"))
+        else:
+            await self.async_request(message["method"], message.get("params"))
+
+    async def _async_send(self, message: dict):
+        if self.standin.latency:
+            await asyncio.sleep(self.standin.latency * random.uniform(0.5, 1.5))
+        text = json.dumps(message)
+        self.standin.stats.bytes_out += len(text.encode())
+        self.standin.record(self.name, "out", message)
+        await self.ws.send_str(text)
+
+    def handle_text(self, text: str):
+        self.standin.stats.bytes_in += len(text.encode())
+        message = json.loads(text)
+        self.standin.record(self.name, "in", message)
+        if "method" in message:
+            # Requests of the server (ping, sampling...) get an empty result
+            if "id" in message:
+                asyncio.create_task(self._async_send({"jsonrpc": "2.0", "id": message["id"], "result": {}}))
+            return
+        if (pending := self._pending.get(message.get("id"))) is None:
+            return
+        start, future = pending
+        self.standin.stats.responses += 1
+        if "error" in message:
+            self.standin.stats.errors += 1
+        self.standin.stats.latencies.append(time.monotonic() - start)
+        if not future.done():
+            future.set_result(message)
+
+    async def async_initialize(self) -> bool:
+        response = await self.async_request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "houzzkit-mcp-standin", "version": "1.0"},
+        })
+        if response is None or "error" in response:
+            return False
+        await self.async_notify("notifications/initialized")
+        self.initialized = True
+        async with self.standin.ready:
+            self.standin.ready.notify_all()
+        return True
+
+    async def async_run_scenario(self, scenario: list[dict], repeat: bool):
+        while not self.ws.closed:
+            for step in scenario:
+                await asyncio.sleep(step.get("delay", 0))
+                if self.ws.closed:
+                    return
+                await self.async_send_message(step["message"])
+            if not repeat:
+                return
+
+
+class McpStandin:
+    """A websocket server standing in for the cloud MCP endpoint.
+
+    Use it as a context manager, so the recording is closed.
+    """
+
+    def __init__(
+        self,
+        scenario: list[dict] | None = None,
+        repeat: bool = False,
+        latency: float = 0.0,
+        disconnect_rate: float = 0.0,
+        record_path: str | None = None,
+    ):
+        self.scenario = scenario
+        self.repeat = repeat
+        self.latency = latency
+        self.disconnect_rate = disconnect_rate
+        self.stats = StandinStats()
+        self.connections: dict[str, SpeakerConnection] = {}
+        # Notified when a speaker has connected, and once it is initialized
+        self.connected = asyncio.Condition()
+        self.ready = asyncio.Condition()
+        self._record_path = record_path
+        self._record = None
+        self._record_last: dict[str, float] = {}
+
+    def __enter__(self) -> "McpStandin":
+        if self._record_path:
+            # Line buffered, so an interrupted run keeps what it recorded
+            self._record = open(self._record_path, "a", encoding="utf-8", buffering=1)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._record:
+            self._record.close()
+            self._record = None
+
+    @property
+    def initialized(self) -> int:
+        return sum(connection.initialized for connection in self.connections.values())
+
+    def record(self, name: str, direction: str, message: dict):
+        if not self._record:
+            return
+        now = time.monotonic()
+        if direction == "out" and message.get("method") not in ("initialize", "notifications/initialized"):
+            # Written in scenario format, so the file can be replayed
+            self._record.write(json.dumps({
+                "delay": round(now - self._record_last.get(name, now), 3),
+                "speaker": name,
+                "message": message,
+            }) + "\n")
+            self._record_last[name] = now
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/mcp/{name}", self._handle_ws)
+        return app
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        name = request.match_info["name"]
+        ws = web.WebSocketResponse(compress=True)
+        await ws.prepare(request)
+        connection = SpeakerConnection(self, name, ws)
+        self.connections[name] = connection
+        self.stats.connections += 1
+        _LOGGER.info("speaker %s connected", name)
+        async with self.connected:
+            self.connected.notify_all()
+
+        tasks = [asyncio.create_task(self._async_drive(connection))]
+        if self.disconnect_rate:
+            tasks.append(asyncio.create_task(self._async_chaos(connection)))
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    connection.handle_text(msg.data)
+                elif msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.connections.get(name) is connection:
+                del self.connections[name]
+            _LOGGER.info("speaker %s disconnected", name)
+        return ws
+
+    async def _async_drive(self, connection: SpeakerConnection):
+        if not await connection.async_initialize():
+            _LOGGER.warning("speaker %s failed to initialize", connection.name)
+            return
+        if self.scenario is not None:
+            await connection.async_run_scenario(
+                speaker_scenario(self.scenario, connection.name), self.repeat
+            )
+
+    async def _async_chaos(self, connection: SpeakerConnection):
+        """Drop the connection at random, disconnect_rate times per second on average."""
+        await asyncio.sleep(random.expovariate(self.disconnect_rate))
+        self.stats.disconnects += 1
+        _LOGGER.info("dropping speaker %s", connection.name)
+        await connection.ws.close()
+
+
+async def async_main(args):
+    scenario = load_scenario(args.replay) if args.replay else DEFAULT_SCENARIO
+    with McpStandin(
+        scenario=scenario,
+        repeat=args.repeat,
+        latency=args.latency,
+        disconnect_rate=args.disconnect_rate,
+        record_path=args.record,
+    ) as standin:
+        runner = web.AppRunner(standin.app())
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port).start()
+        print(f"MCP stand-in listening on ws://{args.host}:{args.port}/mcp/<name>")
+        start = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(args.report_interval)
+                print(json.dumps(standin.stats.report(time.monotonic() - start)))
+        finally:
+            await runner.cleanup()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on, 0.0.0.0 for real speakers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--replay", help="scenario JSONL file to send to each speaker")
+    parser.add_argument("--repeat", action="store_true", help="loop the scenario")
+    parser.add_argument("--record", help="append the messages sent to a JSONL file")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds added before each message")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="random drops per connection per second")
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    return parser
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(async_main(build_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
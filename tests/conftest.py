@@ -0,0 +1,20 @@
+"""Make the houzzkit helpers importable without setting up the integration.
+
+custom_components.houzzkit_ai is registered as a bare package, so importing
+its modules doesn't run the integration __init__, which needs aioesphomeapi,
+bluetooth and the other requirements of a full Home Assistant install.
+"""
+from pathlib import Path
+import sys
+import types
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "custom_components.houzzkit_ai"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(ROOT / "custom_components" / "houzzkit_ai")]
+    sys.modules[PACKAGE] = package
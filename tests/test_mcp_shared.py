@@ -0,0 +1,87 @@
+"""Tests for the single-flight cache of the shared MCP servers."""
+import asyncio
+
+import pytest
+
+# conftest.py skips the integration __init__, the cache only needs these
+pytest.importorskip("homeassistant")
+pytest.importorskip("mcp")
+pytest.importorskip("awesomeversion")
+# Requirement of the mcp_server component the cache builds its servers with
+pytest.importorskip("aiohttp_sse")
+
+from custom_components.houzzkit_ai.houzzkit.mcp_shared import SingleFlightCache
+
+
+def test_waiters_share_one_result():
+    async def run():
+        cache = SingleFlightCache(ttl=60)
+        calls = 0
+        release = asyncio.Event()
+
+        async def factory():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "tools"
+
+        tasks = [asyncio.create_task(cache.async_get("key", factory)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*tasks) == ["tools"] * 3
+        assert calls == 1
+        assert cache.coalesced == 2
+
+    asyncio.run(run())
+
+
+def test_leader_cancelled_while_follower_waits():
+    async def run():
+        cache = SingleFlightCache(ttl=60)
+        started = asyncio.Event()
+        calls = 0
+
+        async def leader_factory():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.Event().wait()
+
+        async def follower_factory():
+            nonlocal calls
+            calls += 1
+            return "live context"
+
+        leader = asyncio.create_task(cache.async_get("key", leader_factory))
+        await started.wait()
+        follower = asyncio.create_task(cache.async_get("key", follower_factory))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # The follower takes over instead of being cancelled with the leader
+        assert await follower == "live context"
+        assert calls == 2
+        assert await cache.async_get("key", follower_factory) == "live context"
+        assert calls == 2
+
+    asyncio.run(run())
+
+
+def test_leader_error_is_shared():
+    async def run():
+        cache = SingleFlightCache(ttl=60)
+        release = asyncio.Event()
+
+        async def factory():
+            await release.wait()
+            raise ValueError("boom")
+
+        tasks = [asyncio.create_task(cache.async_get("key", factory)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(run())